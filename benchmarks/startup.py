@@ -0,0 +1,74 @@
+"""Measures cold-start time of the ecsctrl CLI.
+
+Each scenario is run in a fresh interpreter so import time is included:
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 20 --command "service deploy -e prod.env td.yaml service.yaml"
+"""
+
+import argparse
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+from time import perf_counter
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT_DIR, "tests", "data_files")
+
+SCENARIOS = {
+    "help": ["--help"],
+    "dry-run register": [
+        "--dry-run",
+        "task-definition",
+        "register",
+        "-j",
+        os.path.join(DATA_DIR, "tf-output.json"),
+        os.path.join(DATA_DIR, "task-definition.yaml"),
+    ],
+}
+
+
+def measure(args, runs):
+    timings = []
+    for _ in range(runs):
+        start = perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "ecsctrl", *args],
+            cwd=ROOT_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+        timings.append(perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument(
+        "--command",
+        action="append",
+        default=[],
+        help="Additional ecsctrl command line to measure, ie. a real deploy",
+    )
+    options = parser.parse_args()
+
+    scenarios = dict(SCENARIOS)
+    for command in options.command:
+        scenarios[command] = shlex.split(command)
+
+    print(f"{'scenario':<40} {'min':>8} {'median':>8} {'max':>8}")
+    for name, args in scenarios.items():
+        timings = measure(args, options.runs)
+        print(
+            f"{name:<40} {min(timings) * 1000:>6.0f}ms"
+            f" {statistics.median(timings) * 1000:>6.0f}ms"
+            f" {max(timings) * 1000:>6.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compares pure Python and LibYAML loaders on rendered task definitions.
+
+python benchmarks/yaml_loader.py
+python benchmarks/yaml_loader.py --containers 20 --env-vars 200 --runs 20
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ecsctrl.yaml_converter import TASK_DEFINITION, yaml_to_dict  # noqa: E402
+
+
+def make_task_definition(containers, env_vars):
+    lines = [
+        "family: benchmark-web",
+        "tags:",
+        "  ManagedBy: ECSctrl",
+        "  Environment: benchmark",
+        "networkMode: awsvpc",
+        "cpu: 4096",
+        "memory: 8192",
+        "containerDefinitions:",
+    ]
+    for c in range(containers):
+        lines += [
+            f"  - name: container-{c}",
+            f"    image: 123456789012.dkr.ecr.eu-west-1.amazonaws.com/app:{c}",
+            "    memoryReservation: 512",
+            "    essential: true",
+            "    command: [server, --port, '8000']",
+            "    logConfiguration:",
+            "      logDriver: awslogs",
+            "      options:",
+            f"        awslogs-group: benchmark/container-{c}",
+            "        awslogs-region: eu-west-1",
+            "        awslogs-stream-prefix: app",
+            "    portMappings:",
+            f"      - containerPort: {8000 + c}",
+            f"        hostPort: {8000 + c}",
+            "    environment:",
+        ]
+        lines += [f"      - VARIABLE_{v}=value-{v}-{c}" for v in range(env_vars)]
+        lines += ["    secrets:"]
+        lines += [
+            f"      - SECRET_{v}=arn:aws:ssm:eu-west-1:123456789012:parameter/benchmark/SECRET_{v}"
+            for v in range(env_vars // 4)
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def measure(raw_yaml, loader, runs):
+    timings = []
+    for _ in range(runs):
+        start = perf_counter()
+        yaml_to_dict(raw_yaml, TASK_DEFINITION, loader)
+        timings.append(perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--containers", type=int, default=10)
+    parser.add_argument("--env-vars", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=10)
+    options = parser.parse_args()
+
+    raw_yaml = make_task_definition(options.containers, options.env_vars)
+    print(f"spec size: {len(raw_yaml) / 1024:.0f} KiB")
+
+    python_time = measure(raw_yaml, yaml.Loader, options.runs)
+    print(f"{'yaml.Loader':<12} {python_time * 1000:>8.1f}ms")
+
+    if not yaml.__with_libyaml__:
+        print("PyYAML is built without LibYAML, yaml.CLoader is not available")
+        return
+
+    c_time = measure(raw_yaml, yaml.CLoader, options.runs)
+    print(f"{'yaml.CLoader':<12} {c_time * 1000:>8.1f}ms ({python_time / c_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
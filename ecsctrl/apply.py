@@ -0,0 +1,297 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+import click
+
+from .boto_client import BotoClient
+from .loader import SpecFileLoader
+from .secrets_store import make_put_parameter_params
+from .service_updater import ServiceUpdater
+from .yaml_converter import (
+    JOB_DEFINITION,
+    SECRETS,
+    SERVICE,
+    TASK_DEFINITION,
+    yaml_data_to_dict,
+    yaml_to_dict,
+)
+
+MANIFEST_SECTIONS = {
+    "secrets": SECRETS,
+    "taskDefinitions": TASK_DEFINITION,
+    "jobDefinitions": JOB_DEFINITION,
+    "services": SERVICE,
+}
+
+DESCRIBE_SERVICES_BATCH_SIZE = 10
+
+
+def load_spec(file_path: str, vars: Dict[str, str], file_type: Optional[str] = None):
+    raw_yaml = SpecFileLoader(file_path, vars).load()
+    # parsed without transformations until the file type is known
+    data = yaml_to_dict(raw_yaml, SECRETS)
+    if file_type is None:
+        file_type = detect_file_type(file_path, data)
+        if file_type is None:
+            return None, data
+    if file_type == SECRETS:
+        validate_secrets(file_path, data)
+    return file_type, yaml_data_to_dict(data, file_type)
+
+
+def detect_file_type(file_path: str, data) -> Optional[str]:
+    if not isinstance(data, dict):
+        return None
+    if "containerDefinitions" in data:
+        return TASK_DEFINITION
+    if "jobDefinitionName" in data:
+        return JOB_DEFINITION
+    if "serviceName" in data:
+        return SERVICE
+    # secrets have no distinctive keys, so they are recognised by file name only
+    if "secrets" in os.path.basename(file_path):
+        return SECRETS
+    return None
+
+
+def validate_secrets(file_path: str, data) -> None:
+    if not isinstance(data, dict):
+        raise click.ClickException(f"Secrets file {file_path} is not a mapping.")
+    for secret_name, value in data.items():
+        if isinstance(value, str):
+            continue
+        if (
+            isinstance(value, dict)
+            and isinstance(value.get("Value"), str)
+            and isinstance(value.get("Type"), str)
+        ):
+            continue
+        raise click.ClickException(
+            f"Secret {secret_name} in {file_path} has to be a string or a mapping with Value and Type."
+        )
+
+
+def load_specs(path: str, vars: Dict[str, str]) -> List[Tuple[str, str, dict]]:
+    if os.path.isdir(path):
+        file_names = sorted(
+            name for name in os.listdir(path) if name.endswith((".yaml", ".yml"))
+        )
+        specs = []
+        for file_path in [os.path.join(path, name) for name in file_names]:
+            file_type, spec = load_spec(file_path, vars)
+            if file_type is None:
+                click.echo(f"⏭ Skipped {file_path}, it is not a recognised spec.")
+            else:
+                specs.append((file_path, file_type, spec))
+        return specs
+
+    manifest = yaml_to_dict(SpecFileLoader(path, vars).load(), SECRETS)
+    if not isinstance(manifest, dict):
+        raise click.ClickException(f"Manifest {path} is not a mapping.")
+    base_dir = os.path.dirname(os.path.realpath(path))
+    specs = []
+    for section, file_type in MANIFEST_SECTIONS.items():
+        for file_name in manifest.get(section) or []:
+            file_path = os.path.join(base_dir, file_name)
+            specs.append((file_path, *load_spec(file_path, vars, file_type)))
+    return specs
+
+
+def task_definition_family(task_definition: str) -> str:
+    # accepts family, family:revision and task definition arn
+    return task_definition.rsplit("/", 1)[-1].split(":")[0]
+
+
+class DependencyGraph:
+    def __init__(self, max_workers: int = 10) -> None:
+        self.max_workers = max_workers
+        self.nodes = {}
+
+    def add(self, name: str, action: Callable, dependencies: List[str] = ()):
+        if name in self.nodes:
+            raise click.ClickException(f"Duplicate resource: {name}.")
+        self.nodes[name] = (action, list(dependencies))
+
+    def run(self):
+        results = {}
+        failures = {}
+        skipped = []
+        pending = dict(self.nodes)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+            while pending or running:
+                for name, (action, dependencies) in list(pending.items()):
+                    if any(d in failures or d in skipped for d in dependencies):
+                        skipped.append(name)
+                        del pending[name]
+                    elif all(d in results for d in dependencies):
+                        running[executor.submit(action, results)] = name
+                        del pending[name]
+
+                if not running:
+                    skipped += list(pending)
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    # any error fails only this node, so dependents are skipped
+                    # and the summary still covers every resource
+                    except Exception as e:
+                        failures[name] = e
+                        click.echo(f"💀 Oh no! {name} failed: {e}")
+
+        return results, failures, skipped
+
+
+class ApplyPlan:
+    def __init__(
+        self, boto_client, specs: List[Tuple[str, str, dict]], max_workers: int = 10
+    ) -> None:
+        self.boto_client = boto_client
+        self.specs = specs
+        # dry run prints every call, one worker keeps the printed calls in order
+        self.graph = DependencyGraph(1 if boto_client.dry_run else max_workers)
+        self.service_nodes = []
+        self._build()
+
+    def _build(self):
+        secret_nodes = []
+        task_definition_nodes = {}
+        services = []
+
+        for file_path, file_type, spec in self.specs:
+            if file_type == SECRETS:
+                name = f"secrets {file_path}"
+                self.graph.add(name, self._store_secrets(spec))
+                secret_nodes.append(name)
+            elif file_type == TASK_DEFINITION:
+                family = spec.get("family", "N/A")
+                name = f"task definition {family}"
+                task_definition_nodes[family] = name
+                self.graph.add(name, self._register_task_definition(spec), secret_nodes)
+            elif file_type == JOB_DEFINITION:
+                name = f"job definition {spec.get('jobDefinitionName', 'N/A')}"
+                self.graph.add(name, self._register_job_definition(spec), secret_nodes)
+            elif file_type == SERVICE:
+                services.append(spec)
+
+        if services:
+            self.graph.add("existing services", self._describe_services(services))
+
+        for spec in services:
+            family = task_definition_family(spec.get("taskDefinition", ""))
+            task_definition_node = task_definition_nodes.get(family)
+            dependencies = ["existing services"] + secret_nodes
+            if task_definition_node:
+                dependencies.append(task_definition_node)
+
+            name = f"service {spec.get('cluster')}/{spec.get('serviceName')}"
+            self.service_nodes.append(name)
+            self.graph.add(
+                name,
+                self._create_or_update_service(spec, task_definition_node),
+                dependencies,
+            )
+
+    def run(self):
+        results, failures, skipped = self.graph.run()
+
+        updated_services = {}
+        for name in self.service_nodes:
+            if name in results:
+                cluster_name, service_arn, service_name, settled = results[name]
+                if not settled:
+                    updated_services.setdefault(cluster_name, []).append(
+                        (service_arn, service_name)
+                    )
+
+        return updated_services, failures, skipped
+
+    def _store_secrets(self, spec):
+        def action(results):
+            ssm = BotoClient("ssm", dry_run=self.boto_client.dry_run)
+            for secret_name, value in spec.items():
+                response = ssm.call(
+                    "put_parameter", **make_put_parameter_params(secret_name, value)
+                )
+                click.echo(
+                    f"🔑 Stored secret {secret_name}, parameter version: {response['Version']}"
+                )
+
+        return action
+
+    def _register_task_definition(self, spec):
+        def action(results):
+            response = self.boto_client.call("register_task_definition", **spec)
+            task_definition_arn = response["taskDefinition"]["taskDefinitionArn"]
+            click.echo(
+                f"🗂 Registered task definition {spec.get('family', 'N/A')}, arn: {task_definition_arn}."
+            )
+            return task_definition_arn
+
+        return action
+
+    def _register_job_definition(self, spec):
+        def action(results):
+            client = BotoClient("batch", dry_run=self.boto_client.dry_run)
+            response = client.call("register_job_definition", **spec)
+            job_definition_arn = response["jobDefinitionArn"]
+            click.echo(
+                f"🗂 Registered batch job definition {spec.get('jobDefinitionName', 'N/A')}, arn: {job_definition_arn}."
+            )
+            return job_definition_arn
+
+        return action
+
+    def _describe_services(self, services):
+        def action(results):
+            names_in_clusters = {}
+            for spec in services:
+                names_in_clusters.setdefault(spec.get("cluster"), []).append(
+                    spec.get("serviceName")
+                )
+
+            existing_services = {}
+            for cluster_name, names in names_in_clusters.items():
+                for i in range(0, len(names), DESCRIBE_SERVICES_BATCH_SIZE):
+                    response = self.boto_client.call(
+                        "describe_services",
+                        cluster=cluster_name,
+                        services=names[i : i + DESCRIBE_SERVICES_BATCH_SIZE],
+                    )
+                    for service in response["services"]:
+                        if service.get("status", "INACTIVE") != "INACTIVE":
+                            existing_services[
+                                (cluster_name, service.get("serviceName"))
+                            ] = service
+            return existing_services
+
+        return action
+
+    def _create_or_update_service(self, spec, task_definition_node):
+        def action(results):
+            service_spec = dict(spec)
+            service_name = service_spec.get("serviceName")
+            cluster_name = service_spec.get("cluster")
+            if task_definition_node:
+                service_spec["taskDefinition"] = results[task_definition_node]
+
+            service_description = results["existing services"].get(
+                (cluster_name, service_name)
+            )
+            if service_description:
+                service_arn, settled = ServiceUpdater().update(
+                    self.boto_client, service_spec, service_description
+                )
+                return cluster_name, service_arn, service_name, settled
+
+            response = self.boto_client.call("create_service", **service_spec)
+            click.echo(f"🏸 Created service {service_name}.")
+            return cluster_name, response["service"]["serviceArn"], service_name, False
+
+        return action
@@ -1,29 +1,226 @@
 import json
+import os
+import random
 import sys
+from collections import Counter
 from functools import partial
+from threading import Lock
+from time import monotonic, sleep
+from typing import Optional
 
-import boto3
 import click
-from botocore.loaders import Loader
-from botocore.model import ServiceModel
-from botocore.validate import ParamValidator
+
+from .metrics import CallMetrics, response_size
+
+# boto3 and botocore are imported where they are needed as importing them
+# takes most of ecsctrl's startup time
+
+THROTTLING_ERROR_CODES = {
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestThrottledException",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+    "ProvisionedThroughputExceededException",
+}
+
+# retried like botocore's standard retry mode does
+TRANSIENT_ERROR_CODES = {
+    "RequestTimeout",
+    "RequestTimeoutException",
+    "PriorRequestNotComplete",
+    "InternalError",
+    "InternalFailure",
+    "InternalServerError",
+    "ServerException",
+    "ServiceUnavailable",
+    "ServiceUnavailableException",
+}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated_at = monotonic()
+        self._lock = Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            sleep(wait_time)
+
+    def throttled(self):
+        with self._lock:
+            self.rate = max(self.rate / 2, self.max_rate / 10)
+
+    def succeeded(self):
+        with self._lock:
+            self.rate = min(self.rate + self.max_rate / 20, self.max_rate)
 
 
 class BotoClient:
+    DEFAULT_RATE_LIMIT = 20
+    RATE_LIMITS = {
+        ("ssm", "put_parameter"): 3,
+    }
+    MAX_ATTEMPTS = 8
+    BASE_BACKOFF = 0.5
+    MAX_BACKOFF = 20
+
+    CLIENT_CONFIG = {
+        "max_pool_connections": 50,
+        "tcp_keepalive": True,
+        "connect_timeout": 10,
+        "read_timeout": 60,
+    }
+
+    throttles = Counter()
+    retries = Counter()
+    metrics = CallMetrics()
+
+    _buckets = {}
+    _clients = {}
+    _lock = Lock()
+    _clients_lock = Lock()
+
     def __init__(self, service, dry_run=False) -> None:
         self.dry_run = dry_run
         self.service = service
-        self.client = None
-        if not dry_run:
-            self.client = boto3.client(service)
-        else:
-            self.client = DryBotoClient(service)
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            if not self.dry_run:
+                self._client = self.shared_client(self.service)
+            else:
+                self._client = DryBotoClient(self.service)
+        return self._client
+
+    @classmethod
+    def configure(cls, **client_config):
+        with cls._clients_lock:
+            cls.CLIENT_CONFIG = {**cls.CLIENT_CONFIG, **client_config}
+            cls._clients.clear()
+
+    @classmethod
+    def clear_clients(cls):
+        with cls._clients_lock:
+            cls._clients.clear()
+
+    @classmethod
+    def shared_client(cls, service: str):
+        with cls._clients_lock:
+            if service not in cls._clients:
+                import boto3
+                from botocore.config import Config
+
+                # retries (throttling, 5xx and connection errors) are handled by `call`
+                # so throttles can be rate limited and counted
+                config = Config(retries={"total_max_attempts": 1}, **cls.CLIENT_CONFIG)
+                cls._clients[service] = boto3.client(service, config=config)
+            return cls._clients[service]
+
+    @classmethod
+    def set_rate_limit(cls, service: str, method: str, rate: float):
+        with cls._lock:
+            cls.RATE_LIMITS = {**cls.RATE_LIMITS, (service, method): rate}
+            cls._buckets.pop((service, method), None)
+
+    @classmethod
+    def rate_limiter(cls, service: str, method: str) -> TokenBucket:
+        key = (service, method)
+        with cls._lock:
+            if key not in cls._buckets:
+                rate = cls.RATE_LIMITS.get(key, cls.DEFAULT_RATE_LIMIT)
+                cls._buckets[key] = TokenBucket(rate)
+            return cls._buckets[key]
 
     def call(self, method, *args, **kwargs):
-        return getattr(self.client, method)(*args, **kwargs)
+        call_stats = {"retries": 0, "throttles": 0}
+        response = None
+        error = True
+        started_at = monotonic()
+        try:
+            response = self._call(method, call_stats, *args, **kwargs)
+            error = False
+            return response
+        finally:
+            self.metrics.record(
+                self.service,
+                method,
+                monotonic() - started_at,
+                response_size(response),
+                error=error,
+                **call_stats,
+            )
+
+    def _call(self, method, call_stats, *args, **kwargs):
+        if self.dry_run:
+            return getattr(self.client, method)(*args, **kwargs)
+
+        from botocore.exceptions import ClientError
+        from botocore.exceptions import ConnectionError as BotoConnectionError
+        from botocore.exceptions import HTTPClientError
+
+        key = (self.service, method)
+        rate_limiter = self.rate_limiter(self.service, method)
+        attempt = 1
+        while True:
+            rate_limiter.acquire()
+            try:
+                response = getattr(self.client, method)(*args, **kwargs)
+            except ClientError as e:
+                error_code = e.response.get("Error", {}).get("Code")
+                status_code = e.response.get("ResponseMetadata", {}).get(
+                    "HTTPStatusCode", 0
+                )
+                if error_code in THROTTLING_ERROR_CODES:
+                    rate_limiter.throttled()
+                    self._count(self.throttles, key)
+                    call_stats["throttles"] += 1
+                elif error_code not in TRANSIENT_ERROR_CODES and status_code < 500:
+                    raise
+                if attempt >= self.MAX_ATTEMPTS:
+                    raise
+            except (BotoConnectionError, HTTPClientError):
+                if attempt >= self.MAX_ATTEMPTS:
+                    raise
+            else:
+                rate_limiter.succeeded()
+                return response
+
+            self._count(self.retries, key)
+            call_stats["retries"] += 1
+            backoff = min(self.BASE_BACKOFF * 2 ** (attempt - 1), self.MAX_BACKOFF)
+            sleep(random.uniform(backoff / 2, backoff))
+            attempt += 1
+
+    @classmethod
+    def _count(cls, counter: Counter, key):
+        with cls._lock:
+            counter[key] += 1
 
 
 class DryBotoClient:
+    _service_models = {}
+    _input_shapes = {}
+    _validator = None
+    _lock = Lock()
+
     def __init__(self, service) -> None:
         self.service = service
         self.service_model = self._load_service_model(service)
@@ -38,12 +235,9 @@ class DryBotoClient:
         return self._dry_run_mocked_response(method, params)
 
     def _validate_params(self, method, parameters):
-        operation_name = self._method_name_to_operation_name(method)
-        operation_model = self.service_model.operation_model(operation_name)
-        input_shape = operation_model.input_shape
-        validator = ParamValidator()
+        input_shape = self._input_shape(method)
         if input_shape is not None:
-            report = validator.validate(parameters, input_shape)
+            report = self._param_validator().validate(parameters, input_shape)
             if report.has_errors():
                 click.echo(
                     f"⛔️ BOTO: Function `{self.service}:{method}` parameter validation failed."
@@ -75,13 +269,72 @@ class DryBotoClient:
                 return {"jobDefinitionArn": "N/A"}
         return {}
 
-    def _load_service_model(self, service_name, api_version=None):
+    def _input_shape(self, method):
+        key = (self.service, method)
+        with self._lock:
+            if key not in self._input_shapes:
+                operation_name = self._method_name_to_operation_name(method)
+                operation_model = self.service_model.operation_model(operation_name)
+                self._input_shapes[key] = operation_model.input_shape
+            return self._input_shapes[key]
+
+    @classmethod
+    def _param_validator(cls):
+        with cls._lock:
+            if cls._validator is None:
+                from botocore.validate import ParamValidator
+
+                cls._validator = ParamValidator()
+            return cls._validator
+
+    @classmethod
+    def _load_service_model(cls, service_name, api_version=None):
+        key = (service_name, api_version)
+        with cls._lock:
+            if key not in cls._service_models:
+                from botocore.model import ServiceModel
+
+                json_model = cls._load_json_model(service_name, api_version)
+                cls._service_models[key] = ServiceModel(
+                    json_model, service_name=service_name
+                )
+            return cls._service_models[key]
+
+    @classmethod
+    def _load_json_model(cls, service_name, api_version=None):
+        import botocore
+        from botocore.loaders import Loader
+
+        # ECSCTRL_MODEL_CACHE_DIR keeps decompressed service models between runs
+        cache_dir = os.environ.get("ECSCTRL_MODEL_CACHE_DIR")
+        cache_file = None
+        if cache_dir:
+            cache_file = os.path.join(
+                cache_dir,
+                f"{service_name}-{api_version or 'latest'}-{botocore.__version__}.json",
+            )
+            try:
+                with open(cache_file) as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+
         loader = Loader()
         json_model = loader.load_service_model(
             service_name, "service-2", api_version=api_version
         )
-        service_model = ServiceModel(json_model, service_name=service_name)
-        return service_model
+
+        if cache_file:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+                with open(tmp_file, "w") as f:
+                    json.dump(json_model, f)
+                os.replace(tmp_file, cache_file)
+            except OSError:
+                pass
+
+        return json_model
 
     def _method_name_to_operation_name(self, method_name: str):
         parts = method_name.split("_")
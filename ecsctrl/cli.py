@@ -1,15 +1,30 @@
 import os
 import re
-from email.policy import default
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 import click
 
 from ecsctrl.loader import VarsLoader
 
+from .apply import ApplyPlan, load_specs
 from .boto_client import BotoClient
 from .dump import generate_var_lut
-from .dump.secrets import dump_secrets, render_dumped_secrets
+from .dump.secrets import DumpManifest, dump_secrets, render_dumped_secrets
+from .progress import OUTPUT_FORMATS, TEXT, make_progress, output_option_callback
+from .secrets_store import (
+    CREATED,
+    UNCHANGED,
+    UPDATED,
+    fetch_current_parameters,
+    make_put_parameter_params,
+    parameter_change,
+)
+from .service_index import ServiceIndex
 from .service_updater import ServiceUpdater, TaskDefinitionServiceUpdater, WaitForUpdate
+from .task_definition import TaskDefinitionRegistrar
 from .yaml_converter import (
     JOB_DEFINITION,
     SECRETS,
@@ -31,10 +46,34 @@ def check_var(ctx, param, value):
 # fmt: off
 @click.group()
 @click.option("--dry-run", is_flag=True, default=False, help="Do not call actual AWS API")
+@click.option("--max-pool-connections", default=50, type=int, help="Maximum number of open connections per AWS service (defaults to 50)")
+@click.option("--connect-timeout", default=10, type=int, help="AWS API connection timeout in seconds (defaults to 10s)")
+@click.option("--read-timeout", default=60, type=int, help="AWS API read timeout in seconds (defaults to 60s)")
+@click.option("--stats", is_flag=True, default=False, help="Prints AWS API call statistics per method at exit")
+@click.option("--metrics-file", type=str, default=None, help="Writes AWS API call metrics at exit, in Prometheus textfile format if name ends with .prom, otherwise JSON")
 @click.pass_context
 # fmt: on
-def cli(ctx, dry_run):
+def cli(
+    ctx,
+    dry_run,
+    max_pool_connections,
+    connect_timeout,
+    read_timeout,
+    stats,
+    metrics_file,
+):
     ctx.ensure_object(dict)
+    if stats:
+        ctx.call_on_close(
+            lambda: BotoClient.metrics.echo_table(partial(click.echo, err=True))
+        )
+    if metrics_file:
+        ctx.call_on_close(lambda: BotoClient.metrics.write(metrics_file))
+    BotoClient.configure(
+        max_pool_connections=max_pool_connections,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+    )
     ctx.obj["dry_run"] = dry_run
     ctx.obj["boto_client"] = BotoClient("ecs", dry_run=dry_run)
 
@@ -61,6 +100,8 @@ def wait_options(wait_for, many=False):
         # fmt: off
         fn = click.option("--wait", "-w", is_flag=True, help=f"Waits for service{s} to finish {wait_for}")(fn)
         fn = click.option("--wait-timeout", default=600, type=int, help=f"Custom timeout in seconds (defaults to 600s)")(fn)
+        fn = click.option("--wait-interval", default=60, type=int, help=f"Maximum pause between status checks in seconds (defaults to 60s)")(fn)
+        fn = click.option("--output", default=TEXT, type=click.Choice(OUTPUT_FORMATS), callback=output_option_callback, help=f"Waiter progress format: full text report, compact state changes or JSON events on stdout with other messages on stderr (defaults to text)")(fn)
         # fmt: on
         return fn
 
@@ -72,6 +113,11 @@ def wait_options(wait_for, many=False):
 @click.argument("spec-file", type=str)
 @common_options
 @click.option("--update-services-in-cluster", "-c", multiple=True, type=str, help="Updates all services deployed with this task in a particular cluster")
+@click.option("--service-index/--no-service-index", is_flag=True, default=False, help="Uses on-disk index of cluster services instead of scanning whole cluster")
+@click.option("--service-index-ttl", default=3600, type=int, help="Seconds after which service index is fully rebuilt (defaults to 3600s)")
+@click.option("--refresh-index", is_flag=True, default=False, help="Forces full rebuild of service index")
+@click.option("--family-tag", type=str, default=None, help="Finds services to update by this tag holding task definition family instead of scanning whole cluster")
+@click.option("--skip-unchanged", is_flag=True, default=False, help="Reuses latest active revision if it matches the spec instead of registering a new one")
 @wait_options(wait_for="update", many=True)
 @click.pass_context
 # fmt: on
@@ -83,34 +129,67 @@ def register(
     var,
     sys_env,
     update_services_in_cluster,
+    service_index,
+    service_index_ttl,
+    refresh_index,
+    family_tag,
+    skip_unchanged,
     wait,
     wait_timeout,
+    wait_interval,
+    output,
 ):
     """Register task definition."""
 
     vars = VarsLoader(env_file, var, json_file, sys_env).load()
     spec = yaml_file_to_dict(spec_file, vars, TASK_DEFINITION)
-    task_family = spec.get("family", "N/A")
-    click.echo(f"🗂 Registering task definition {task_family}.")
-    response = ctx.obj["boto_client"].call("register_task_definition", **spec)
-    task_definition_arn = response["taskDefinition"]["taskDefinitionArn"]
-    click.echo(f"\t✅ done, task definition arn: {task_definition_arn}.")
+    registrar = TaskDefinitionRegistrar(ctx.obj["boto_client"])
+    task_definition_arn = registrar.register(spec, skip_unchanged)
 
     if update_services_in_cluster and not ctx.obj["dry_run"]:
-        updated_services = {}
-
-        for cluster_name in update_services_in_cluster:
-            updater = TaskDefinitionServiceUpdater(
-                ctx.obj["boto_client"], task_definition_arn, cluster_name
+        index = None
+        if service_index or refresh_index:
+            index = ServiceIndex(ttl=service_index_ttl, refresh=refresh_index)
+
+        updaters = [
+            TaskDefinitionServiceUpdater(
+                ctx.obj["boto_client"],
+                task_definition_arn,
+                cluster_name,
+                service_index=index,
+                family_tag=family_tag,
+            )
+            for cluster_name in update_services_in_cluster
+        ]
+
+        with ThreadPoolExecutor(max_workers=len(updaters)) as executor:
+            updated_services = dict(
+                zip(
+                    update_services_in_cluster,
+                    executor.map(lambda updater: updater.update(), updaters),
+                )
             )
-            updated_services_in_cluster = updater.update()
-            updated_services[cluster_name] = updated_services_in_cluster
+
+        failed_services = [
+            (updater.cluster_name, service_name)
+            for updater in updaters
+            for service_arn, service_name in updater.failed_services
+        ]
 
         if wait:
             waiter = WaitForUpdate(ctx.obj["boto_client"], updated_services)
             waiter.timeout = wait_timeout
+            waiter.wait_time = wait_interval
+            waiter.progress = make_progress(output)
             waiter.wait_for_all()
 
+        if failed_services:
+            for cluster_name, service_name in failed_services:
+                click.echo(
+                    f"💀 Oh no! Service {service_name} in cluster {cluster_name} failed to update."
+                )
+            sys.exit(1)
+
 
 @cli.group(name="batch-job-definition")
 @click.pass_context
@@ -164,6 +243,8 @@ def create(
     sys_env,
     wait,
     wait_timeout,
+    wait_interval,
+    output,
 ):
     """Create a new service."""
 
@@ -182,6 +263,8 @@ def create(
             {cluster_name: [(service_arn, service_name)]},
         )
         waiter.timeout = wait_timeout
+        waiter.wait_time = wait_interval
+        waiter.progress = make_progress(output)
         waiter.wait_for_all()
 
 
@@ -199,6 +282,8 @@ def update(
     sys_env,
     wait,
     wait_timeout,
+    wait_interval,
+    output,
 ):
     """Update an existing service."""
 
@@ -206,12 +291,16 @@ def update(
     spec = yaml_file_to_dict(spec_file, vars, SERVICE)
     service_name = spec.get("serviceName")
     cluster_name = spec.get("cluster")
-    click.echo(f"🏸 Updating service {service_name}.")
-    updater = ServiceUpdater()
-    spec = updater.make_update_payload(spec)
-    response = ctx.obj["boto_client"].call("update_service", **spec)
-    service_arn = response["service"]["serviceArn"]
-    click.echo("\t✅ done.")
+
+    response = ctx.obj["boto_client"].call(
+        "describe_services",
+        cluster=cluster_name,
+        services=[service_name],
+    )
+    service_description = next(iter(response["services"]), None)
+    service_arn, settled = ServiceUpdater().update(
+        ctx.obj["boto_client"], spec, service_description
+    )
 
     if wait:
         waiter = WaitForUpdate(
@@ -219,6 +308,10 @@ def update(
             {cluster_name: [(service_arn, service_name)]},
         )
         waiter.timeout = wait_timeout
+        waiter.wait_time = wait_interval
+        waiter.progress = make_progress(output)
+        if settled:
+            waiter.settled_services.add((cluster_name, service_name))
         waiter.wait_for_all()
 
 
@@ -236,6 +329,8 @@ def create_or_update(
     sys_env,
     wait,
     wait_timeout,
+    wait_interval,
+    output,
 ):
     """Check if service exists and update it or create a new one."""
 
@@ -250,18 +345,17 @@ def create_or_update(
         services=[service_name],
     )
     service_exists = len(response["services"]) > 0
+    settled = False
 
     if service_exists:
-        click.echo(f"🏸 Updating service {service_name}.")
-        updater = ServiceUpdater()
-        spec = updater.make_update_payload(spec)
-        response = ctx.obj["boto_client"].call("update_service", **spec)
-        click.echo("\t✅ done.")
+        service_arn, settled = ServiceUpdater().update(
+            ctx.obj["boto_client"], spec, response["services"][0]
+        )
     else:
         click.echo(f"🏸 Creating service {service_name}.")
         response = ctx.obj["boto_client"].call("create_service", **spec)
         click.echo("\t✅ done.")
-    service_arn = response["service"]["serviceArn"]
+        service_arn = response["service"]["serviceArn"]
 
     if wait:
         waiter = WaitForUpdate(
@@ -269,6 +363,10 @@ def create_or_update(
             {cluster_name: [(service_arn, service_name)]},
         )
         waiter.timeout = wait_timeout
+        waiter.wait_time = wait_interval
+        waiter.progress = make_progress(output)
+        if settled:
+            waiter.settled_services.add((cluster_name, service_name))
         waiter.wait_for_all()
 
 
@@ -281,6 +379,24 @@ def secrets(ctx):
 @secrets.command()
 @click.argument("spec-file", type=str)
 @common_options
+@click.option(
+    "--skip-unchanged",
+    is_flag=True,
+    default=False,
+    help="Reads current values and stores only secrets that differ",
+)
+@click.option(
+    "--workers",
+    default=4,
+    type=click.IntRange(min=1),
+    help="Number of secrets stored concurrently (defaults to 4)",
+)
+@click.option(
+    "--tps",
+    default=3.0,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Maximum put_parameter calls per second (defaults to 3, SSM standard throughput limit)",
+)
 @click.pass_context
 def store(
     ctx,
@@ -289,37 +405,75 @@ def store(
     json_file,
     var,
     sys_env,
+    skip_unchanged,
+    workers,
+    tps,
 ):
     """Store secrets is Parameter Store."""
+    from botocore.exceptions import BotoCoreError, ClientError
+
     vars = VarsLoader(env_file, var, json_file, sys_env).load()
     spec = yaml_file_to_dict(spec_file, vars, SECRETS)
     ssm = BotoClient("ssm", dry_run=ctx.obj["boto_client"].dry_run)
+    BotoClient.set_rate_limit("ssm", "put_parameter", tps)
+
+    all_ssm_params = [
+        make_put_parameter_params(secret_name, value)
+        for secret_name, value in spec.items()
+    ]
+
+    current = {}
+    if skip_unchanged:
+        current = fetch_current_parameters(ssm, all_ssm_params)
+    changes = [
+        parameter_change(ssm_params, current) if skip_unchanged else None
+        for ssm_params in all_ssm_params
+    ]
+    summary = Counter()
+    failures = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # dry run prints every call, so calls are made inline to keep spec order
+        futures = [
+            (
+                executor.submit(ssm.call, "put_parameter", **ssm_params)
+                if change != UNCHANGED and not ssm.dry_run
+                else None
+            )
+            for ssm_params, change in zip(all_ssm_params, changes)
+        ]
+
+        # results are reported in spec order regardless of completion order
+        for ssm_params, change, future in zip(all_ssm_params, changes, futures):
+            secret_name = ssm_params["Name"]
+            if change == UNCHANGED:
+                click.echo(f"🔑 Secret {secret_name} is unchanged.")
+                summary[change] += 1
+                continue
+
+            click.echo(f"🔑 Storing secret {secret_name}.")
+            try:
+                if future is None:
+                    response = ssm.call("put_parameter", **ssm_params)
+                else:
+                    response = future.result()
+            except (BotoCoreError, ClientError) as e:
+                failures[secret_name] = e
+                click.echo(f"\t💀 failed: {e}")
+                continue
+            click.echo(f"\t✅ done, parameter version: {response['Version']}")
+            summary[change] += 1
+
+    if skip_unchanged:
+        click.echo(
+            f"📊 {summary[CREATED]} created, {summary[UPDATED]} updated, {summary[UNCHANGED]} unchanged."
+        )
 
-    for secret_name, value in spec.items():
-        common_ssm_params = {
-            "Name": secret_name,
-            "Overwrite": True,
-            "Tier": "Intelligent-Tiering",
-        }
-
-        if isinstance(value, str):
-            ssm_params = {
-                **common_ssm_params,
-                "Value": value,
-                "Type": "SecureString",
-            }
-        else:
-            ssm_params = {
-                **common_ssm_params,
-                "Value": value["Value"],
-                "Type": value["Type"],
-            }
-            if value.get("Description", None):
-                ssm_params["Description"] = value["Description"]
-
-        click.echo(f"🔑 Storing secret {secret_name}.")
-        response = ssm.call("put_parameter", **ssm_params)
-        click.echo(f"\t✅ done, parameter version: {response['Version']}")
+    if failures:
+        click.echo(f"💀 Oh no! {len(failures)} secret/s/ failed to store:")
+        for secret_name, error in failures.items():
+            click.echo(f"\t🔴 {secret_name}: {error}")
+        sys.exit(1)
 
 
 @secrets.command()
@@ -330,12 +484,19 @@ def store(
     default=None,
     help="Export only secrets matching given regexp pattern",
 )
+@click.option(
+    "--incremental",
+    is_flag=True,
+    default=False,
+    help="Decrypt only secrets changed since previous dump to the same file",
+)
 @common_options
 @click.pass_context
 def dump(
     ctx,
     spec_file,
     filter,
+    incremental,
     env_file,
     json_file,
     var,
@@ -345,14 +506,26 @@ def dump(
     vars = VarsLoader(env_file, var, json_file, sys_env).load()
     var_lut = generate_var_lut(vars)
     ssm = BotoClient("ssm", dry_run=ctx.obj["boto_client"].dry_run)
-    secrets = dump_secrets(ssm, filter)
-    render_dumped_secrets(click, secrets, var_lut, spec_file)
+    if incremental:
+        manifest = DumpManifest(spec_file, var_lut).load()
+        secrets = manifest.track(dump_secrets(ssm, filter, manifest))
+        render_dumped_secrets(click, secrets, var_lut, spec_file)
+        manifest.save()
+    else:
+        secrets = dump_secrets(ssm, filter)
+        render_dumped_secrets(click, secrets, var_lut, spec_file)
 
 
 @service.command()
 @click.argument("task-definition-spec-file", type=str)
 @click.argument("service-spec-file", type=str)
 @common_options
+@click.option(
+    "--skip-unchanged",
+    is_flag=True,
+    default=False,
+    help="Reuses latest active task definition revision if it matches the spec",
+)
 @wait_options(wait_for="update")
 @click.pass_context
 def deploy(
@@ -363,8 +536,11 @@ def deploy(
     json_file,
     var,
     sys_env,
+    skip_unchanged,
     wait,
     wait_timeout,
+    wait_interval,
+    output,
 ):
     """All-in-one - register task definition and create or update service."""
 
@@ -372,40 +548,47 @@ def deploy(
     task_definition_spec = yaml_file_to_dict(
         task_definition_spec_file, vars, TASK_DEFINITION
     )
-    task_family = task_definition_spec.get("family", "N/A")
-    click.echo(f"🗂 Registering task definition {task_family}.")
-    response = ctx.obj["boto_client"].call(
-        "register_task_definition", **task_definition_spec
-    )
-    task_definition_arn = response["taskDefinition"]["taskDefinitionArn"]
-    click.echo(f"\t✅ done, task definition arn: {task_definition_arn}.")
-
     service_spec = yaml_file_to_dict(service_spec_file, vars, SERVICE)
     service_name = service_spec.get("serviceName")
     cluster_name = service_spec.get("cluster")
-    service_spec["taskDefinition"] = task_definition_arn
 
-    response = ctx.obj["boto_client"].call(
+    registrar = TaskDefinitionRegistrar(ctx.obj["boto_client"])
+    describe_services = partial(
+        ctx.obj["boto_client"].call,
         "describe_services",
         cluster=service_spec["cluster"],
         services=[service_name],
     )
+
+    if ctx.obj["dry_run"]:
+        # nothing to overlap, calls are made in order to keep printed calls in order
+        task_definition_arn = registrar.register(task_definition_spec, skip_unchanged)
+        response = describe_services()
+    else:
+        # existence check does not depend on the new task definition revision
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            describe_future = executor.submit(describe_services)
+            task_definition_arn = registrar.register(
+                task_definition_spec, skip_unchanged
+            )
+            response = describe_future.result()
+
+    service_spec["taskDefinition"] = task_definition_arn
     existing_services = list(
-        filter(lambda s: s["status"] != "INACTIVE", response["services"])
+        filter(lambda s: s.get("status") != "INACTIVE", response["services"])
     )
     service_exists = len(existing_services) > 0
+    settled = False
 
     if service_exists:
-        click.echo(f"🏸 Updating service {service_name}.")
-        updater = ServiceUpdater()
-        service_spec = updater.make_update_payload(service_spec)
-        response = ctx.obj["boto_client"].call("update_service", **service_spec)
-        click.echo("\t✅ done.")
+        service_arn, settled = ServiceUpdater().update(
+            ctx.obj["boto_client"], service_spec, existing_services[0]
+        )
     else:
         click.echo(f"🏸 Creating service {service_name}.")
         response = ctx.obj["boto_client"].call("create_service", **service_spec)
         click.echo("\t✅ done.")
-    service_arn = response["service"]["serviceArn"]
+        service_arn = response["service"]["serviceArn"]
 
     if wait:
         waiter = WaitForUpdate(
@@ -413,4 +596,50 @@ def deploy(
             {cluster_name: [(service_arn, service_name)]},
         )
         waiter.timeout = wait_timeout
+        waiter.wait_time = wait_interval
+        waiter.progress = make_progress(output)
+        if settled:
+            waiter.settled_services.add((cluster_name, service_name))
+        waiter.wait_for_all()
+
+
+# fmt: off
+@cli.command()
+@click.argument("manifest", type=str)
+@common_options
+@click.option("--max-workers", default=10, type=click.IntRange(min=1), help="Number of resources applied concurrently (defaults to 10)")
+@wait_options(wait_for="update", many=True)
+@click.pass_context
+# fmt: on
+def apply(
+    ctx,
+    manifest,
+    env_file,
+    json_file,
+    var,
+    sys_env,
+    max_workers,
+    wait,
+    wait_timeout,
+    wait_interval,
+    output,
+):
+    """Apply all resources from a manifest file or a directory of specs."""
+
+    vars = VarsLoader(env_file, var, json_file, sys_env).load()
+    specs = load_specs(manifest, vars)
+    plan = ApplyPlan(ctx.obj["boto_client"], specs, max_workers)
+    updated_services, failures, skipped = plan.run()
+
+    if wait and updated_services:
+        waiter = WaitForUpdate(ctx.obj["boto_client"], updated_services)
+        waiter.timeout = wait_timeout
+        waiter.wait_time = wait_interval
+        waiter.progress = make_progress(output)
         waiter.wait_for_all()
+
+    if failures or skipped:
+        for name in skipped:
+            click.echo(f"⏭ Skipped {name} because its dependencies failed.")
+        click.echo(f"💀 Oh no! {len(failures)} resource/s/ failed to apply.")
+        sys.exit(1)
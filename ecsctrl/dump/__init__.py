@@ -1,3 +1,4 @@
+from collections import deque
 from typing import Generator, Tuple
 
 
@@ -19,18 +20,77 @@ def flat_dict_items(value, path="") -> Generator[Tuple[str, str], None, None]:
         yield path, value
 
 
+class VarLut(dict):
+    # var value -> var path, longest values first; names are matched with
+    # an Aho-Corasick automaton compiled on first use
+
+    def substitute(self, key: str) -> str:
+        if not hasattr(self, "_automaton"):
+            self._automaton = self._compile()
+        goto, fail, best_match, patterns = self._automaton
+
+        best = len(patterns)
+        node = 0
+        for char in key:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            best = min(best, best_match[node])
+
+        if best < len(patterns):
+            var_value = patterns[best]
+        elif "" in self:
+            var_value = ""
+        else:
+            return key
+
+        return key.replace(var_value, r"{{ " + self[var_value] + r" }}")
+
+    def _compile(self):
+        patterns = [var_value for var_value in self if var_value]
+        no_match = len(patterns)
+        goto = [{}]
+        best_match = [no_match]
+
+        for priority, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                if char not in goto[node]:
+                    goto.append({})
+                    best_match.append(no_match)
+                    goto[node][char] = len(goto) - 1
+                node = goto[node][char]
+            best_match[node] = min(best_match[node], priority)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, next_node in goto[node].items():
+                fallback = fail[node]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_node] = goto[fallback].get(char, 0)
+                best_match[next_node] = min(
+                    best_match[next_node], best_match[fail[next_node]]
+                )
+                queue.append(next_node)
+
+        return goto, fail, best_match, patterns
+
+
 def generate_var_lut(vars):
-    return {
-        str(value): str(path)
-        for path, value in sorted(
-            list(flat_dict_items(vars)), key=lambda x: -len(str(x[1]))
-        )
-    }
+    return VarLut(
+        {
+            str(value): str(path)
+            for path, value in sorted(
+                list(flat_dict_items(vars)), key=lambda x: -len(str(x[1]))
+            )
+        }
+    )
 
 
 def substitute_with_expressions(key: str, vars_lut) -> str:
-    for var_value, var_name in vars_lut.items():
-        if var_value in key:
-            key = key.replace(var_value, r"{{ " + var_name + r" }}")
-            return key
-    return key
+    if not isinstance(vars_lut, VarLut):
+        vars_lut = VarLut(vars_lut)
+    return vars_lut.substitute(key)
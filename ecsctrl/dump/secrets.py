@@ -1,7 +1,10 @@
+import hashlib
+import json
+import os
 import re
 from . import substitute_with_expressions
 from dataclasses import dataclass
-from typing import Generator, Optional, Sequence
+from typing import Dict, Generator, Optional, Sequence
 
 
 @dataclass
@@ -10,14 +13,99 @@ class Parameter:
     value: str
     type: str
     description: Optional[str]
+    version: Optional[int] = None
+    last_modified_date: Optional[str] = None
+    dumped_text: Optional[str] = None
+
+
+class DumpManifest:
+    # versions of dumped secrets, kept in a sidecar file next to the dump
+    def __init__(self, target_file: str, vars_lut) -> None:
+        self.target_file = target_file
+        self.manifest_file = f"{target_file}.manifest.json"
+        self.vars_hash = hashlib.sha256(
+            json.dumps(vars_lut, sort_keys=True).encode()
+        ).hexdigest()
+        self.versions = {}
+        self.dumped_texts = {}
+        self.dumped_versions = {}
+
+    def load(self) -> "DumpManifest":
+        try:
+            with open(self.manifest_file) as f:
+                manifest = json.load(f)
+            self.dumped_texts = read_dumped_secrets(self.target_file)
+        except (OSError, ValueError):
+            return self
+
+        # secret names are rendered with vars, so changed vars invalidate the dump
+        if manifest.get("varsHash") == self.vars_hash:
+            self.dumped_versions = manifest.get("parameters", {})
+        return self
+
+    def dumped_text(self, parameter: dict) -> Optional[str]:
+        name = parameter["Name"]
+        if self.dumped_versions.get(name) != self._version(parameter):
+            return None
+        return self.dumped_texts.get(name)
+
+    def track(self, secrets) -> Generator[Parameter, None, None]:
+        for parameter in secrets:
+            self.versions[parameter.name] = {
+                "Version": parameter.version,
+                "LastModifiedDate": parameter.last_modified_date,
+            }
+            yield parameter
+
+    def save(self):
+        tmp_file = f"{self.manifest_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump({"varsHash": self.vars_hash, "parameters": self.versions}, f)
+        os.replace(tmp_file, self.manifest_file)
+
+    @staticmethod
+    def _version(parameter: dict) -> Dict[str, Optional[str]]:
+        return {
+            "Version": parameter.get("Version"),
+            "LastModifiedDate": _date_to_str(parameter.get("LastModifiedDate")),
+        }
+
+
+def _date_to_str(date) -> Optional[str]:
+    if date is None:
+        return None
+    return date.isoformat() if hasattr(date, "isoformat") else str(date)
+
 
+DESCRIBE_PARAMETERS_PAGE_SIZE = 50
+GET_PARAMETERS_BATCH_SIZE = 10
 
-def list_secrets(ssm):
+
+def name_prefix(filter: str) -> str:
+    # longest literal prefix every name matching `filter` with re.match starts with
+    if "|" in filter:
+        return ""
+
+    prefix = ""
+    for char in filter.lstrip("^"):
+        if char in ".^$*+?{}[]()\\":
+            if char in "*?{":
+                prefix = prefix[:-1]
+            break
+        prefix += char
+    return prefix
+
+
+def list_secrets(ssm, prefix=None):
     should_fetch = True
     next_token = None
 
     while should_fetch:
-        kwargs = {}
+        kwargs = {"MaxResults": DESCRIBE_PARAMETERS_PAGE_SIZE}
+        if prefix:
+            kwargs["ParameterFilters"] = [
+                {"Key": "Name", "Option": "BeginsWith", "Values": [prefix]}
+            ]
         if next_token:
             kwargs["NextToken"] = next_token
         response = ssm.call("describe_parameters", **kwargs)
@@ -28,27 +116,93 @@ def list_secrets(ssm):
             yield parameter
 
 
-def dump_secrets(ssm, filter=None) -> Generator[Parameter, None, None]:
-    for parameter in list_secrets(ssm):
+def get_secrets(
+    ssm, parameters, manifest: Optional[DumpManifest] = None
+) -> Generator[Parameter, None, None]:
+    dumped_texts = {}
+    if manifest is not None:
+        for parameter in parameters:
+            dumped_text = manifest.dumped_text(parameter)
+            if dumped_text is not None:
+                dumped_texts[parameter["Name"]] = dumped_text
+
+    values = {}
+    names = [p["Name"] for p in parameters if p["Name"] not in dumped_texts]
+    if names:
+        response = ssm.call("get_parameters", Names=names, WithDecryption=True)
+        values = {p["Name"]: p for p in response.get("Parameters", [])}
+
+    for parameter in parameters:
         parameter_name = parameter["Name"]
-        if filter is None or re.match(filter, parameter_name):
-            response = ssm.call(
-                "get_parameter",
-                Name=parameter_name,
-                WithDecryption=True,
-            )
+        version = {
+            "version": parameter.get("Version"),
+            "last_modified_date": _date_to_str(parameter.get("LastModifiedDate")),
+        }
 
+        if parameter_name in dumped_texts:
             yield Parameter(
                 name=parameter_name,
-                value=response["Parameter"]["Value"],
-                type=response["Parameter"]["Type"],
+                value=None,
+                type=parameter.get("Type"),
                 description=parameter.get("Description", None),
+                dumped_text=dumped_texts[parameter_name],
+                **version,
             )
+            continue
+
+        if parameter_name not in values:
+            continue
+
+        yield Parameter(
+            name=parameter_name,
+            value=values[parameter_name]["Value"],
+            type=values[parameter_name]["Type"],
+            description=parameter.get("Description", None),
+            **version,
+        )
+
+
+def dump_secrets(
+    ssm, filter=None, manifest: Optional[DumpManifest] = None
+) -> Generator[Parameter, None, None]:
+    prefix = name_prefix(filter) if filter is not None else None
+    batch = []
+
+    for parameter in list_secrets(ssm, prefix):
+        parameter_name = parameter["Name"]
+        if filter is None or re.match(filter, parameter_name):
+            batch.append(parameter)
+
+        if len(batch) == GET_PARAMETERS_BATCH_SIZE:
+            yield from get_secrets(ssm, batch, manifest)
+            batch = []
+
+    if batch:
+        yield from get_secrets(ssm, batch, manifest)
+
+
+def read_dumped_secrets(target_file: str) -> Dict[str, str]:
+    with open(target_file) as f:
+        contents = f.read()
+
+    pieces = re.split(r"^# Dumped from `(.+)`:\n", contents, flags=re.MULTILINE)
+    # pieces: [preamble, name, text, name, text, ...]; each text ends with extra "\n"
+    return {
+        name: text[:-1] if text.endswith("\n\n") else text
+        for name, text in zip(pieces[1::2], pieces[2::2])
+    }
 
 
 def render_dumped_secrets(click, secrets: Sequence[Parameter], vars_lut, target_file):
     with open(target_file, "w") as f:
         for parameter in secrets:
+            if parameter.dumped_text is not None:
+                f.write(f"# Dumped from `{parameter.name}`:\n")
+                f.write(parameter.dumped_text)
+                f.write(f"\n")
+                click.echo(f"🔑 Kept unchanged secret {parameter.name}.")
+                continue
+
             key, secret_text = rended_single_secret(parameter, vars_lut)
             f.write(f"# Dumped from `{parameter.name}`:\n")
             f.write(secret_text)
@@ -1,14 +1,7 @@
 import json
-import logging
 import os
 from typing import Dict, List
 
-from jinja2 import Environment, FileSystemLoader, Undefined, make_logging_undefined
-from jinja2.exceptions import TemplateNotFound
-from jinja2.utils import open_if_exists
-
-logger = logging.getLogger(__name__)
-
 
 class EnvFileLoader:
     def __init__(self, file_path: str):
@@ -45,41 +38,6 @@ class JsonFileLoader:
 
 
 class SpecFileLoader:
-    class JinjaLoader(FileSystemLoader):
-        def split_template_path(self, template):
-            # based on https://github.com/pallets/jinja/blob/ca8b0b0287e320fe1f4a74f36910ef7ae3303d99/src/jinja2/loaders.py#L19
-            pieces = []
-            for piece in template.split("/"):
-                if piece and piece != ".":
-                    pieces.append(piece)
-            return pieces
-
-        def get_source(self, environment, template):
-            # based on https://github.com/pallets/jinja/blob/ca8b0b0287e320fe1f4a74f36910ef7ae3303d99/src/jinja2/loaders.py#L174
-            pieces = self.split_template_path(template)
-            for searchpath in self.searchpath:
-                filename = os.path.join(searchpath, *pieces)
-                f = open_if_exists(filename)
-                if f is None:
-                    continue
-                try:
-                    contents = f.read().decode(self.encoding)
-                finally:
-                    f.close()
-
-                mtime = os.path.getmtime(filename)
-
-                def uptodate():
-                    try:
-                        return os.path.getmtime(filename) == mtime
-                    except OSError:
-                        return False
-
-                return contents, filename, uptodate
-            raise TemplateNotFound(template)
-
-    LoggingUndefined = make_logging_undefined(logger=logger, base=Undefined)
-
     def __init__(self, file_path: str, vars: Dict[str, str]):
         self.file_path = file_path
         self.vars = vars
@@ -87,17 +45,13 @@ class SpecFileLoader:
         self.base_dir = os.path.dirname(os.path.realpath(file_path))
 
     def load(self) -> str:
-        with open(self.file_path) as f:
-            file_data = f.read()
-
-        return self._render(file_data, self.vars)
+        # jinja2 is imported on first render to keep CLI startup fast
+        from .templating import get_environment
 
-    def _render(self, file_data: str, env: Dict[str, str]) -> str:
-        jinja_env = Environment(
-            loader=self.JinjaLoader(self.base_dir), undefined=self.LoggingUndefined
-        )
-        jinja_template = jinja_env.from_string(str(file_data))
-        return jinja_template.render(env)
+        jinja_env = get_environment(self.base_dir)
+        template_name = os.path.basename(os.path.realpath(self.file_path))
+        jinja_template = jinja_env.get_template(template_name)
+        return jinja_template.render(self.vars)
 
 
 class VarsLoader:
@@ -0,0 +1,150 @@
+import json
+import os
+from threading import Lock
+from typing import List, Optional
+
+import click
+
+PROMETHEUS_METRICS = [
+    ("calls_total", "counter", "calls", "AWS API calls made by ecsctrl."),
+    ("errors_total", "counter", "errors", "AWS API calls that raised an error."),
+    ("retries_total", "counter", "retries", "Retried AWS API call attempts."),
+    ("throttles_total", "counter", "throttles", "Throttled AWS API call attempts."),
+    (
+        "latency_seconds_sum",
+        "counter",
+        "latencySum",
+        "Time spent in AWS API calls including retries.",
+    ),
+    (
+        "latency_seconds_max",
+        "gauge",
+        "latencyMax",
+        "Slowest AWS API call including retries.",
+    ),
+    (
+        "response_bytes_total",
+        "counter",
+        "responseBytes",
+        "Size of AWS API responses.",
+    ),
+]
+
+
+def response_size(response) -> int:
+    if not isinstance(response, dict):
+        return 0
+    headers = response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+    try:
+        return int(headers.get("content-length", 0))
+    except ValueError:
+        return 0
+
+
+class CallMetrics:
+    def __init__(self) -> None:
+        self.calls = {}
+        self._lock = Lock()
+
+    def record(
+        self,
+        service: str,
+        method: str,
+        latency: float,
+        response_bytes: int = 0,
+        retries: int = 0,
+        throttles: int = 0,
+        error: bool = False,
+    ) -> None:
+        with self._lock:
+            stats = self.calls.setdefault(
+                (service, method),
+                {
+                    "calls": 0,
+                    "errors": 0,
+                    "retries": 0,
+                    "throttles": 0,
+                    "latencySum": 0.0,
+                    "latencyMax": 0.0,
+                    "responseBytes": 0,
+                },
+            )
+            stats["calls"] += 1
+            stats["errors"] += int(error)
+            stats["retries"] += retries
+            stats["throttles"] += throttles
+            stats["latencySum"] += latency
+            stats["latencyMax"] = max(stats["latencyMax"], latency)
+            stats["responseBytes"] += response_bytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+    def rows(self) -> List[dict]:
+        with self._lock:
+            return [
+                {"service": service, "method": method, **stats}
+                for (service, method), stats in sorted(self.calls.items())
+            ]
+
+    def table(self) -> List[str]:
+        header = ["SERVICE", "METHOD", "CALLS", "ERRORS", "RETRIES", "THROTTLES"]
+        header += ["AVG", "MAX", "TOTAL", "BYTES"]
+        lines = [header]
+        for row in self.rows():
+            lines.append(
+                [
+                    row["service"],
+                    row["method"],
+                    str(row["calls"]),
+                    str(row["errors"]),
+                    str(row["retries"]),
+                    str(row["throttles"]),
+                    f"{row['latencySum'] / row['calls']:.3f}s",
+                    f"{row['latencyMax']:.3f}s",
+                    f"{row['latencySum']:.3f}s",
+                    str(row["responseBytes"]),
+                ]
+            )
+
+        widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+        return [
+            "  ".join(
+                cell.ljust(width) if i < 2 else cell.rjust(width)
+                for i, (cell, width) in enumerate(zip(line, widths))
+            ).rstrip()
+            for line in lines
+        ]
+
+    def echo_table(self, echo=click.echo) -> None:
+        echo("📊 AWS API calls:")
+        for line in self.table():
+            echo(line)
+
+    def to_json(self) -> str:
+        return json.dumps({"calls": self.rows()}, indent=2)
+
+    def to_prometheus(self) -> str:
+        rows = self.rows()
+        lines = []
+        for name, metric_type, field, description in PROMETHEUS_METRICS:
+            lines.append(f"# HELP ecsctrl_api_{name} {description}")
+            lines.append(f"# TYPE ecsctrl_api_{name} {metric_type}")
+            for row in rows:
+                labels = f'service="{row["service"]}",method="{row["method"]}"'
+                lines.append(f"ecsctrl_api_{name}{{{labels}}} {row[field]}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, file_path: str, file_format: Optional[str] = None) -> None:
+        if file_format is None:
+            file_format = "prometheus" if file_path.endswith(".prom") else "json"
+        contents = (
+            self.to_prometheus() if file_format == "prometheus" else self.to_json()
+        )
+
+        # textfile collectors may read the file at any moment
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(contents)
+        os.replace(tmp_path, file_path)
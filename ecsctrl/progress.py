@@ -0,0 +1,204 @@
+import json
+import sys
+from contextlib import redirect_stdout
+from functools import partial
+from threading import Lock
+from typing import List
+
+import click
+
+TEXT = "text"
+COMPACT = "compact"
+JSON = "json"
+
+OUTPUT_FORMATS = [TEXT, COMPACT, JSON]
+
+JSON_STDOUT = "ecsctrl.json_stdout"
+
+
+def starting_tasks(status: dict) -> int:
+    return len([t for t in status["tasks"] if t["age"] < status["minTaskAge"]])
+
+
+def outdated_tasks(status: dict) -> int:
+    return len(
+        [
+            t
+            for t in status["tasks"]
+            if t["taskDefinitionArn"] != status["taskDefinition"]
+        ]
+    )
+
+
+def service_state(status: dict) -> str:
+    if status["critical"]:
+        return "failed"
+    if status["failures"]:
+        return "in_progress"
+    return "settled"
+
+
+class TextProgress:
+    animated = True
+
+    def __init__(self, echo=click.echo) -> None:
+        self.echo = echo
+
+    def service_lines(self, status: dict) -> List[str]:
+        lines = [
+            "🔍 Running checks",
+            f"🌎 Cluster: {status['cluster']}",
+            f"🏓 Service: {status['service']}",
+            f"\t👮‍♀️ Desired task count: {status['desiredCount']}",
+        ]
+
+        ok = status["desiredCount"] == status["runningCount"]
+        lines.append(
+            f"\t{'😀' if ok else '😱'} Running task count: {status['runningCount']}"
+        )
+        ok = status["pendingCount"] == 0
+        lines.append(
+            f"\t{'😀' if ok else '😱'} Pending task count: {status['pendingCount']}"
+        )
+
+        lines.append(f"\t👮🏽‍♂️ Desired task definition: {status['taskDefinition']}")
+
+        for task in status["tasks"]:
+            task_arn = task["taskArn"]
+            if task["age"] >= status["minTaskAge"]:
+                lines.append(f"\t😀 Task {task_arn} age is OK")
+            else:
+                lines.append(
+                    f"\t😱 Task {task_arn} is to young ({task['age']}s, {status['minTaskAge']}s minimum)"
+                )
+
+            if task["taskDefinitionArn"] == status["taskDefinition"]:
+                lines.append(f"\t😀 Task {task_arn} task definition is OK")
+            else:
+                lines.append(
+                    f"\t😱 Task {task_arn} task definition is {task['taskDefinitionArn']}"
+                )
+
+        if status["rolloutState"] == "COMPLETED":
+            lines.append("\t😀 Primary deployment completed.")
+        elif status["rolloutState"] == "IN_PROGRESS":
+            lines.append("\t🧑‍🔧 Primary deployment is still in progress.")
+        elif status["rolloutState"] == "FAILED":
+            lines.append("\t💀 Oh no! Primary deployment failed.")
+            return lines
+
+        if not status["failures"]:
+            lines.append("\t✅ Service updated successfully.")
+
+        return lines
+
+    def service(self, status: dict) -> None:
+        self.echo("\n".join(self.service_lines(status)))
+
+    def waiting(self, failed_checks: int, wait_time: float) -> None:
+        self.echo(f"⏳ Waiting for things to settle ({failed_checks} check/s/ failed)")
+
+    def resumed(self, resumed_after: int, time_passed: int) -> None:
+        self.echo("")
+        self.echo(
+            f"🚀 Resuming after {resumed_after}s ({time_passed}s passed from the beginning) "
+        )
+
+    def done(self, time_passed: int) -> None:
+        self.echo("🍾 All done.")
+
+    def failed(self, time_passed: int) -> None:
+        self.echo("💀 Oh no! Deployment failed. Exiting.")
+
+    def timed_out(self, time_passed: int) -> None:
+        self.echo("💀 Oh no! Timeout reached. Exiting.")
+
+
+class CompactProgress(TextProgress):
+    animated = False
+    STATE_ICONS = {"settled": "✅", "in_progress": "⏳", "failed": "💀"}
+
+    def __init__(self, echo=click.echo) -> None:
+        super().__init__(echo)
+        self.last_rows = {}
+        self.last_failed_checks = None
+        self._lock = Lock()
+
+    def service_row(self, status: dict) -> str:
+        return (
+            f"{self.STATE_ICONS[service_state(status)]} {status['cluster']}/{status['service']}:"
+            f" {status['runningCount']}/{status['desiredCount']} running,"
+            f" {status['pendingCount']} pending,"
+            f" {starting_tasks(status)} starting,"
+            f" {outdated_tasks(status)} outdated,"
+            f" rollout {status['rolloutState'] or 'N/A'}"
+        )
+
+    def service(self, status: dict) -> None:
+        key = (status["cluster"], status["service"])
+        row = self.service_row(status)
+        with self._lock:
+            if self.last_rows.get(key) == row:
+                return
+            self.last_rows[key] = row
+        self.echo(row)
+
+    def waiting(self, failed_checks: int, wait_time: float) -> None:
+        if failed_checks != self.last_failed_checks:
+            self.last_failed_checks = failed_checks
+            super().waiting(failed_checks, wait_time)
+
+    def resumed(self, resumed_after: int, time_passed: int) -> None:
+        pass
+
+    def done(self, time_passed: int) -> None:
+        self.echo(f"🍾 All done in {time_passed}s.")
+
+
+class JsonProgress(CompactProgress):
+    def emit(self, event: str, **fields) -> None:
+        self.echo(json.dumps({"event": event, **fields}))
+
+    def service_row(self, status: dict) -> str:
+        return json.dumps(
+            {
+                "event": "service",
+                "cluster": status["cluster"],
+                "service": status["service"],
+                "state": service_state(status),
+                "taskDefinition": status["taskDefinition"],
+                "desiredCount": status["desiredCount"],
+                "runningCount": status["runningCount"],
+                "pendingCount": status["pendingCount"],
+                "startingTasks": starting_tasks(status),
+                "outdatedTasks": outdated_tasks(status),
+                "rolloutState": status["rolloutState"],
+            }
+        )
+
+    def waiting(self, failed_checks: int, wait_time: float) -> None:
+        self.emit("waiting", failedChecks=failed_checks, waitTime=round(wait_time, 1))
+
+    def done(self, time_passed: int) -> None:
+        self.emit("done", elapsed=time_passed)
+
+    def failed(self, time_passed: int) -> None:
+        self.emit("failed", elapsed=time_passed)
+
+    def timed_out(self, time_passed: int) -> None:
+        self.emit("timeout", elapsed=time_passed)
+
+
+def output_option_callback(ctx, param, value):
+    if value == JSON:
+        # JSON events are the only thing written to stdout, everything else goes to stderr
+        ctx.meta[JSON_STDOUT] = sys.stdout
+        ctx.with_resource(redirect_stdout(sys.stderr))
+    return value
+
+
+def make_progress(output: str = TEXT):
+    if output == JSON:
+        stdout = click.get_current_context().meta.get(JSON_STDOUT, sys.stdout)
+        return JsonProgress(partial(click.echo, file=stdout))
+    return {TEXT: TextProgress, COMPACT: CompactProgress}[output]()
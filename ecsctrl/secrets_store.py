@@ -0,0 +1,87 @@
+from typing import Dict, List
+
+GET_PARAMETERS_BATCH_SIZE = 10
+DESCRIBE_PARAMETERS_FILTER_SIZE = 50
+
+CREATED = "created"
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+
+
+def make_put_parameter_params(secret_name: str, value) -> dict:
+    common_ssm_params = {
+        "Name": secret_name,
+        "Overwrite": True,
+        "Tier": "Intelligent-Tiering",
+    }
+
+    if isinstance(value, str):
+        ssm_params = {
+            **common_ssm_params,
+            "Value": value,
+            "Type": "SecureString",
+        }
+    else:
+        ssm_params = {
+            **common_ssm_params,
+            "Value": value["Value"],
+            "Type": value["Type"],
+        }
+        if value.get("Description", None):
+            ssm_params["Description"] = value["Description"]
+
+    return ssm_params
+
+
+def fetch_current_parameters(ssm, params: List[dict]) -> Dict[str, dict]:
+    names = [p["Name"] for p in params]
+    current = {}
+
+    for i in range(0, len(names), GET_PARAMETERS_BATCH_SIZE):
+        response = ssm.call(
+            "get_parameters",
+            Names=names[i : i + GET_PARAMETERS_BATCH_SIZE],
+            WithDecryption=True,
+        )
+        for parameter in response.get("Parameters", []):
+            current[parameter["Name"]] = {
+                "Value": parameter["Value"],
+                "Type": parameter["Type"],
+            }
+
+    # descriptions are not returned by get_parameters
+    described_names = [
+        p["Name"] for p in params if "Description" in p and p["Name"] in current
+    ]
+    for i in range(0, len(described_names), DESCRIBE_PARAMETERS_FILTER_SIZE):
+        kwargs = {
+            "ParameterFilters": [
+                {
+                    "Key": "Name",
+                    "Option": "Equals",
+                    "Values": described_names[i : i + DESCRIBE_PARAMETERS_FILTER_SIZE],
+                }
+            ]
+        }
+        while True:
+            response = ssm.call("describe_parameters", **kwargs)
+            for parameter in response.get("Parameters", []):
+                current[parameter["Name"]]["Description"] = parameter.get("Description")
+            if response.get("NextToken"):
+                kwargs["NextToken"] = response["NextToken"]
+            else:
+                break
+
+    return current
+
+
+def parameter_change(ssm_params: dict, current: Dict[str, dict]) -> str:
+    current_parameter = current.get(ssm_params["Name"])
+    if current_parameter is None:
+        return CREATED
+
+    for field in ["Value", "Type", "Description"]:
+        if field in ssm_params and ssm_params[field] != current_parameter.get(field):
+            return UPDATED
+
+    return UNCHANGED
@@ -0,0 +1,77 @@
+import json
+import os
+from threading import Lock
+from time import time
+from typing import Dict, Optional
+
+DEFAULT_INDEX_FILE = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "ecsctrl",
+    "service-index.json",
+)
+
+
+class ServiceIndex:
+    def __init__(
+        self, file_path: Optional[str] = None, ttl: int = 3600, refresh: bool = False
+    ) -> None:
+        self.file_path = (
+            file_path or os.environ.get("ECSCTRL_SERVICE_INDEX") or DEFAULT_INDEX_FILE
+        )
+        self.ttl = ttl
+        self.refresh = refresh
+        self.clusters = None
+        self._lock = Lock()
+
+    def load(self) -> Dict[str, dict]:
+        with self._lock:
+            if self.clusters is None:
+                self.clusters = self._read()
+            return self.clusters
+
+    def _read(self) -> Dict[str, dict]:
+        try:
+            with open(self.file_path) as f:
+                clusters = json.load(f).get("clusters", {})
+            # malformed entries are dropped and rebuilt on next scan
+            return {
+                name: cluster
+                for name, cluster in clusters.items()
+                if isinstance(cluster.get("services"), dict)
+                and isinstance(cluster.get("refreshedAt"), (int, float))
+            }
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def get_services(self, cluster_name: str) -> Optional[Dict[str, dict]]:
+        cluster = self.load().get(cluster_name)
+        if self.refresh or cluster is None:
+            return None
+        if time() - cluster["refreshedAt"] > self.ttl:
+            return None
+        return dict(cluster["services"])
+
+    def set_services(
+        self, cluster_name: str, services: Dict[str, dict], full_refresh: bool
+    ) -> None:
+        clusters = self.load()
+        with self._lock:
+            refreshed_at = time()
+            if not full_refresh and cluster_name in clusters:
+                refreshed_at = clusters[cluster_name]["refreshedAt"]
+            clusters[cluster_name] = {
+                "refreshedAt": refreshed_at,
+                "services": services,
+            }
+            self._save()
+
+    def _save(self) -> None:
+        # index is only a cache, services are still updated when it can't be saved
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.file_path)), exist_ok=True)
+            tmp_path = f"{self.file_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"clusters": self.clusters}, f)
+            os.replace(tmp_path, self.file_path)
+        except OSError:
+            pass
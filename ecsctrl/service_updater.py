@@ -1,62 +1,212 @@
 import math
 import os
+import random
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
+from threading import Lock
 from time import sleep, time
-from typing import Dict, List
+from typing import Dict, Generator, List, Optional, Tuple
 
 import click
 
+from .boto_client import BotoClient
+from .progress import TextProgress
+from .service_index import ServiceIndex
+
 
 class TaskDefinitionServiceUpdater:
+    LIST_SERVICES_PAGE_SIZE = 100
+
     def __init__(
-        self, boto_client, task_definition_arn: str, cluster_name: str
+        self,
+        boto_client,
+        task_definition_arn: str,
+        cluster_name: str,
+        service_index: Optional[ServiceIndex] = None,
+        family_tag: Optional[str] = None,
     ) -> None:
         self.boto_client = boto_client
         self.task_definition_arn = task_definition_arn
         self.cluster_name = cluster_name
+        self.service_index = service_index
+        self.family_tag = family_tag
         self.task_definition_family = re.findall(
             r".+\/(.+)\:\d+?", self.task_definition_arn
         )
+        self.max_workers = 10
+        self.updated_services = []
+        self.failed_services = {}
 
-    def update(self) -> List[str]:
-        services = self.find_services_to_update()
-        for service_arn, service_name in services:
-            click.echo(f"🏗 Updating service {service_name}.")
-            self.update_service(service_arn)
-            click.echo("\t✅ done.")
-        return services
+    def update(self) -> List[Tuple[str, str]]:
+        from botocore.exceptions import BotoCoreError, ClientError
 
-    def find_services_to_update(self) -> List[str]:
         services = []
+        self.updated_services = []
+        self.failed_services = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {}
+            for service_arn, service_name in self.iter_services_to_update():
+                services.append((service_arn, service_name))
+                future = executor.submit(self.update_service, service_arn)
+                futures[future] = (service_arn, service_name)
+
+            for future in as_completed(futures):
+                service_arn, service_name = futures[future]
+                try:
+                    future.result()
+                except (BotoCoreError, ClientError) as e:
+                    self.failed_services[(service_arn, service_name)] = e
+                    click.echo(f"🏗 Updating service {service_name}.\n\t💀 failed: {e}")
+                else:
+                    self.updated_services.append((service_arn, service_name))
+                    click.echo(f"🏗 Updating service {service_name}.\n\t✅ done.")
+
+        return [service for service in services if service in self.updated_services]
+
+    def find_services_to_update(self) -> List[Tuple[str, str]]:
+        return list(self.iter_services_to_update())
+
+    def iter_services_to_update(self) -> Generator[Tuple[str, str], None, None]:
+        if self.family_tag is not None:
+            services = self._iter_described_services([self._tagged_service_arns()])
+        elif self.service_index is not None:
+            services = self._indexed_services()
+        else:
+            services = self._iter_described_services(self._iter_service_arn_pages())
+
+        for service in services:
+            if self._uses_task_definition_family(service):
+                yield service["serviceArn"], service["serviceName"]
+
+    def _indexed_services(self) -> List[dict]:
+        indexed_services = self.service_index.get_services(self.cluster_name)
+        full_refresh = indexed_services is None
+
+        if full_refresh:
+            indexed_services = {}
+            arn_pages = self._iter_service_arn_pages()
+        else:
+            arns = [arn for page in self._iter_service_arn_pages() for arn in page]
+            new_arns = {arn for arn in arns if arn not in indexed_services}
+            arn_pages = [[arn for arn in arns if arn in new_arns]]
+            indexed_services = {
+                arn: indexed_services[arn] for arn in arns if arn in indexed_services
+            }
+
+        for service in self._iter_described_services(arn_pages):
+            indexed_services[service["serviceArn"]] = self._index_entry(service)
+
+        if not full_refresh:
+            # cached matches are described again as a service may have switched to
+            # another family since the index was built
+            matched_arns = [
+                arn
+                for arn, service in indexed_services.items()
+                if arn not in new_arns and self._uses_task_definition_family(service)
+            ]
+            for arn in matched_arns:
+                del indexed_services[arn]
+            for service in self._iter_described_services([matched_arns]):
+                indexed_services[service["serviceArn"]] = self._index_entry(service)
+
+        self.service_index.set_services(
+            self.cluster_name, indexed_services, full_refresh
+        )
+        return list(indexed_services.values())
+
+    def _index_entry(self, service: dict) -> dict:
+        return {
+            k: service[k]
+            for k in ["serviceArn", "serviceName", "status", "taskDefinition"]
+        }
+
+    def _tagged_service_arns(self) -> List[str]:
+        tagging_client = BotoClient(
+            "resourcegroupstaggingapi", dry_run=self.boto_client.dry_run
+        )
+        arns = []
 
         kwargs = {}
         while True:
-            list_response = self.boto_client.call(
-                "list_services", maxResults=10, cluster=self.cluster_name, **kwargs
+            response = tagging_client.call(
+                "get_resources",
+                ResourceTypeFilters=["ecs:service"],
+                TagFilters=[
+                    {"Key": self.family_tag, "Values": self.task_definition_family}
+                ],
+                ResourcesPerPage=100,
+                **kwargs,
             )
-            describe_response = self.boto_client.call(
-                "describe_services",
-                cluster=self.cluster_name,
-                services=list_response["serviceArns"],
-            )
-
-            for service in describe_response["services"]:
-                if service["status"] == "INACTIVE":
-                    continue
-
-                task_definition = service["taskDefinition"]
-                service_task_name = re.findall(r".+\/(.+)\:\d+?", task_definition)
-                if service_task_name == self.task_definition_family:
-                    services.append((service["serviceArn"], service["serviceName"]))
+            for resource in response["ResourceTagMappingList"]:
+                if self._is_service_in_cluster(resource["ResourceARN"]):
+                    arns.append(resource["ResourceARN"])
 
-            if list_response.get("nextToken"):
-                kwargs["nextToken"] = list_response["nextToken"]
+            if response.get("PaginationToken"):
+                kwargs["PaginationToken"] = response["PaginationToken"]
             else:
                 break
 
-        return services
+        return arns
+
+    def _is_service_in_cluster(self, service_arn: str) -> bool:
+        # arn:aws:ecs:<region>:<account>:service/<cluster>/<service>
+        resource = service_arn.split(":", 5)[-1].split("/")
+        if len(resource) != 3:
+            # old format arn:...:service/<service> has no cluster, services from
+            # other clusters are returned by describe_services as failures
+            return True
+        cluster_name = self.cluster_name.split(":cluster/")[-1]
+        return resource[1] == cluster_name
+
+    def _iter_service_arn_pages(self) -> Generator[List[str], None, None]:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            next_page = executor.submit(self._list_services_page, None)
+            while next_page is not None:
+                list_response = next_page.result()
+                next_token = list_response.get("nextToken")
+                next_page = None
+                if next_token:
+                    next_page = executor.submit(self._list_services_page, next_token)
+
+                yield list_response["serviceArns"]
+
+    def _iter_described_services(self, arn_pages) -> Generator[dict, None, None]:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for arns in arn_pages:
+                describe_futures = [
+                    executor.submit(self._describe_services, arns[i : i + 10])
+                    for i in range(0, len(arns), 10)
+                ]
+
+                for describe_future in describe_futures:
+                    yield from describe_future.result()
+
+    def _list_services_page(self, next_token: Optional[str]):
+        kwargs = {}
+        if next_token:
+            kwargs["nextToken"] = next_token
+        return self.boto_client.call(
+            "list_services",
+            maxResults=self.LIST_SERVICES_PAGE_SIZE,
+            cluster=self.cluster_name,
+            **kwargs,
+        )
+
+    def _describe_services(self, arns: List[str]) -> List[dict]:
+        return self.boto_client.call(
+            "describe_services", cluster=self.cluster_name, services=arns
+        )["services"]
+
+    def _uses_task_definition_family(self, service: dict) -> bool:
+        if service["status"] == "INACTIVE":
+            return False
+
+        task_definition = service["taskDefinition"]
+        service_task_name = re.findall(r".+\/(.+)\:\d+?", task_definition)
+        return service_task_name == self.task_definition_family
 
     def update_service(self, service_arn: str):
         self.boto_client.call(
@@ -67,29 +217,91 @@ class TaskDefinitionServiceUpdater:
         )
 
 
+class PollScheduler:
+    def __init__(
+        self,
+        min_interval: float = 5,
+        max_interval: float = 60,
+        backoff: float = 1.5,
+        jitter: float = 0.2,
+    ) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.interval = min_interval
+
+    def next_interval(self, settle_in: Optional[float] = None) -> float:
+        interval = min(self.interval, self.max_interval)
+        self.interval = interval * self.backoff
+        # jitter only shortens the pause so the ceiling is never exceeded
+        interval *= random.uniform(1 - self.jitter, 1)
+
+        if settle_in is not None and settle_in < interval:
+            interval = max(settle_in, self.min_interval)
+
+        return min(interval, self.max_interval)
+
+
 class WaitForUpdate:
+    DESCRIBE_TASKS_BATCH_SIZE = 100
+
     def __init__(self, boto_client, services_in_clusters: Dict[str, str]) -> None:
         self.boto_client = boto_client
         self.services_in_clusters = services_in_clusters
         self.timeout = 600
         self.wait_time = 60
+        self.min_wait_time = 5
         self.min_task_age = 60
+        self.max_workers = 10
+        self.settle_in = None
+        self.settled_services = set()
+        self.progress = TextProgress()
+        self._lock = Lock()
 
     def describe_all_services(self):
-        described_services = []
+        chunks = []
         for cluster, services in self.services_in_clusters.items():
-            arns = [service_arn for service_arn, service_name in services]
+            arns = [
+                service_arn
+                for service_arn, service_name in services
+                if (cluster, service_name) not in self.settled_services
+            ]
             while arns:
-                response = self.boto_client.call(
-                    "describe_services", cluster=cluster, services=arns[:10]
-                )
-                for service_description in response["services"]:
-                    service_description["clusterName"] = cluster
-                    described_services.append(service_description)
-
+                chunks.append((cluster, arns[:10]))
                 arns = arns[10:]
 
-        return described_services
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            responses = list(executor.map(self._describe_services_chunk, chunks))
+
+        return [
+            service_description
+            for described_chunk in responses
+            for service_description in described_chunk
+        ]
+
+    def _describe_services_chunk(self, chunk):
+        cluster, arns = chunk
+        response = self.boto_client.call(
+            "describe_services", cluster=cluster, services=arns
+        )
+        for service_description in response["services"]:
+            service_description["clusterName"] = cluster
+        return response["services"]
+
+    def _check_and_report(self, service_description):
+        status = self.service_status(service_description)
+        failures, critical = status["failures"], status["critical"]
+        with self._lock:
+            self.progress.service(status)
+            if not failures and not critical:
+                self.settled_services.add(
+                    (
+                        service_description["clusterName"],
+                        service_description["serviceName"],
+                    )
+                )
+        return failures, critical
 
     def wait_for_all(self):
         total_failures = 1
@@ -97,128 +309,159 @@ class WaitForUpdate:
         deadline = time() + self.timeout
         start_time = time()
 
+        scheduler = PollScheduler(
+            min_interval=min(self.min_wait_time, self.wait_time),
+            max_interval=self.wait_time,
+        )
+
         while total_failures and not total_critical:
             total_failures = 0
             total_critical = False
+            self.settle_in = None
             services = self.describe_all_services()
-            for service in services:
-                failures, critical = self.check_single_service(service)
-                total_failures += failures
-                total_critical = total_critical or critical
-                sleep(0.2)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(self._check_and_report, service)
+                    for service in services
+                ]
+                for future in as_completed(futures):
+                    failures, critical = future.result()
+                    total_failures += failures
+                    total_critical = total_critical or critical
 
             if total_critical:
-                click.echo("💀 Oh no! Deployment failed. Exiting.")
+                self.progress.failed(math.floor(time() - start_time))
                 sys.exit(1)
 
             if total_failures == 0:
-                click.echo("🍾 All done.")
+                self.progress.done(math.floor(time() - start_time))
                 return
             else:
                 if time() > deadline:
-                    click.echo("💀 Oh no! Timeout reached. Exiting.")
+                    self.progress.timed_out(math.floor(time() - start_time))
                     sys.exit(1)
                 else:
-                    click.echo(
-                        f"⏳ Waiting for things to settle ({total_failures} check/s/ failed)"
-                    )
+                    wait_time = scheduler.next_interval(self.settle_in)
+                    self.progress.waiting(total_failures, wait_time)
 
                     pause_time = time()
-                    if not os.environ.get("CI"):
+                    if self.progress.animated and not os.environ.get("CI"):
                         animation = "🕐🕑🕒🕓🕔🕕🕖🕗🕘🕙🕚🕛"
-                        for i in range(self.wait_time * 10):
+                        for i in range(math.ceil(wait_time * 10)):
                             sys.stdout.write("\r" + animation[i % len(animation)])
                             sys.stdout.flush()
                             sleep(0.1)
                         sys.stdout.write("\r")
                         sys.stdout.flush()
                     else:
-                        sleep(self.wait_time)
+                        sleep(wait_time)
 
                     time_passed = math.floor(time() - start_time)
                     resumed_after = math.floor(time() - pause_time)
-                    click.echo("")
-                    click.echo(
-                        f"🚀 Resuming after {resumed_after}s ({time_passed}s passed from the beginning) "
-                    )
+                    self.progress.resumed(resumed_after, time_passed)
+
+    def list_service_task_arns(self, cluster_name: str, service_name: str) -> List[str]:
+        task_arns = []
 
-    def check_single_service(self, service_description):
+        kwargs = {}
+        while True:
+            response = self.boto_client.call(
+                "list_tasks", serviceName=service_name, cluster=cluster_name, **kwargs
+            )
+            task_arns += response["taskArns"]
+
+            if response.get("nextToken"):
+                kwargs["nextToken"] = response["nextToken"]
+            else:
+                break
+
+        return task_arns
+
+    def describe_service_tasks(
+        self, cluster_name: str, service_name: str
+    ) -> List[dict]:
+        tasks = []
+        arns = self.list_service_task_arns(cluster_name, service_name)
+        while arns:
+            response = self.boto_client.call(
+                "describe_tasks",
+                tasks=arns[: self.DESCRIBE_TASKS_BATCH_SIZE],
+                cluster=cluster_name,
+            )
+            tasks += response["tasks"]
+            arns = arns[self.DESCRIBE_TASKS_BATCH_SIZE :]
+
+        return tasks
+
+    def check_single_service(self, service_description, echo=click.echo):
+        status = self.service_status(service_description)
+        for line in TextProgress().service_lines(status):
+            echo(line)
+        return status["failures"], status["critical"]
+
+    def service_status(self, service_description) -> dict:
         failures = 0
+        critical = False
 
         cluster_name = service_description["clusterName"]
         service_name = service_description["serviceName"]
         service_task_definition = service_description["taskDefinition"]
-        service_task_desired_count = service_description["desiredCount"]
-        service_task_running_count = service_description["runningCount"]
-        service_task_pending_count = service_description["pendingCount"]
+        desired_count = service_description["desiredCount"]
+        running_count = service_description["runningCount"]
+        pending_count = service_description["pendingCount"]
 
         deployments = service_description["deployments"]
         primary_deployment = [d for d in deployments if d["status"] == "PRIMARY"][0]
 
-        click.echo("🔍 Running checks")
-        click.echo(f"🌎 Cluster: {cluster_name}")
-        click.echo(f"🏓 Service: {service_name}")
-
-        click.echo(f"\t👮‍♀️ Desired task count: {service_task_desired_count}")
-
-        if service_task_desired_count == service_task_running_count:
-            click.echo(f"\t😀 Running task count: {service_task_running_count}")
-        else:
-            click.echo(f"\t😱 Running task count: {service_task_running_count}")
+        if desired_count != running_count:
             failures += 1
-
-        if service_task_pending_count == 0:
-            click.echo(f"\t😀 Pending task count: {service_task_pending_count}")
-        else:
-            click.echo(f"\t😱 Pending task count: {service_task_pending_count}")
+        if pending_count != 0:
             failures += 1
 
-        click.echo(f"\t👮🏽‍♂️ Desired task definition: {service_task_definition}")
-
-        task_arns = self.boto_client.call(
-            "list_tasks", serviceName=service_name, cluster=cluster_name
-        )["taskArns"]
-
-        for task_arn in task_arns:
-            task = self.boto_client.call(
-                "describe_tasks", tasks=[task_arn], cluster=cluster_name
-            )["tasks"][0]
-
+        tasks = []
+        for task in self.describe_service_tasks(cluster_name, service_name):
             task_age = int(
                 datetime.now().replace(tzinfo=timezone.utc).timestamp()
                 - task["createdAt"].replace(tzinfo=timezone.utc).timestamp()
             )
             task_task_definition = task["taskDefinitionArn"]
 
-            if task_age >= self.min_task_age:
-                click.echo(f"\t😀 Task {task_arn} age is OK")
-            else:
-                click.echo(
-                    f"\t😱 Task {task_arn} is to young ({task_age}s, {self.min_task_age}s minimum)"
-                )
+            if task_age < self.min_task_age:
                 failures += 1
+                settle_in = self.min_task_age - task_age + 1
+                with self._lock:
+                    if self.settle_in is None or settle_in < self.settle_in:
+                        self.settle_in = settle_in
 
-            if task_task_definition == service_task_definition:
-                click.echo(f"\t😀 Task {task_arn} task definition is OK")
-            else:
-                click.echo(
-                    f"\t😱 Task {task_arn} task definition is {task_task_definition}"
-                )
+            if task_task_definition != service_task_definition:
                 failures += 1
 
-        if primary_deployment["rolloutState"] == "COMPLETED":
-            click.echo("\t😀 Primary deployment completed.")
-        elif primary_deployment["rolloutState"] == "IN_PROGRESS":
-            click.echo("\t🧑‍🔧 Primary deployment is still in progress.")
-        elif primary_deployment["rolloutState"] == "FAILED":
-            click.echo("\t💀 Oh no! Primary deployment failed.")
-            failures += 1
-            return failures, True
-
-        if not failures:
-            click.echo("\t✅ Service updated successfully.")
+            tasks.append(
+                {
+                    "taskArn": task["taskArn"],
+                    "age": task_age,
+                    "taskDefinitionArn": task_task_definition,
+                }
+            )
 
-        return failures, False
+        rollout_state = primary_deployment["rolloutState"]
+        if rollout_state == "FAILED":
+            failures += 1
+            critical = True
+
+        return {
+            "cluster": cluster_name,
+            "service": service_name,
+            "taskDefinition": service_task_definition,
+            "desiredCount": desired_count,
+            "runningCount": running_count,
+            "pendingCount": pending_count,
+            "rolloutState": rollout_state,
+            "minTaskAge": self.min_task_age,
+            "tasks": tasks,
+            "failures": failures,
+            "critical": critical,
+        }
 
 
 class ServiceUpdater:
@@ -246,6 +489,13 @@ class ServiceUpdater:
         "serviceRegistries",
     ]
 
+    # ECS fills in defaults for omitted keys of these fields, other fields are
+    # replaced as a whole by update_service and have to match exactly
+    DEFAULTED_FIELDS = [
+        "deploymentConfiguration",
+        "capacityProviderStrategy",
+    ]
+
     def make_update_payload(self, create_payload):
         payload_with_translated_fields = {
             self.CREATE_TO_UPDATE.get(k, k): v for k, v in create_payload.items()
@@ -258,3 +508,73 @@ class ServiceUpdater:
         }
 
         return update_payload
+
+    def is_unchanged(self, update_payload: dict, service_description: dict) -> bool:
+        if service_description.get("status") != "ACTIVE":
+            return False
+        if update_payload.get("forceNewDeployment"):
+            return False
+
+        for field, value in update_payload.items():
+            if field in ["cluster", "service", "forceNewDeployment"]:
+                continue
+            current = service_description.get(field)
+            if field == "taskDefinition":
+                if not self._same_task_definition(value, current):
+                    return False
+            elif not self._matches(
+                value, current, subset=field in self.DEFAULTED_FIELDS
+            ):
+                return False
+
+        return True
+
+    def is_settled(self, service_description: dict) -> bool:
+        deployments = service_description.get("deployments", [])
+        return (
+            len(deployments) == 1
+            and deployments[0].get("rolloutState", "COMPLETED") == "COMPLETED"
+            and service_description.get("runningCount")
+            == service_description.get("desiredCount")
+            and service_description.get("pendingCount") == 0
+        )
+
+    def update(self, boto_client, create_payload: dict, service_description=None):
+        service_name = create_payload.get("serviceName")
+        update_payload = self.make_update_payload(create_payload)
+
+        if service_description and self.is_unchanged(
+            update_payload, service_description
+        ):
+            click.echo(f"🏸 Service {service_name} is unchanged, skipping update.")
+            return service_description["serviceArn"], self.is_settled(
+                service_description
+            )
+
+        click.echo(f"🏸 Updating service {service_name}.")
+        response = boto_client.call("update_service", **update_payload)
+        click.echo("\t✅ done.")
+        return response["service"]["serviceArn"], False
+
+    def _same_task_definition(self, wanted, current) -> bool:
+        # bare family resolves to latest active revision, which is not known here
+        if not wanted or not current:
+            return False
+        return wanted == current or current.endswith(f"/{wanted}")
+
+    def _matches(self, wanted, current, subset=False) -> bool:
+        if isinstance(wanted, dict):
+            if not isinstance(current, dict):
+                return False
+            if not subset and set(wanted) != set(current):
+                return False
+            return all(
+                self._matches(v, current.get(k), subset) for k, v in wanted.items()
+            )
+        if isinstance(wanted, list):
+            if not isinstance(current, list) or len(wanted) != len(current):
+                return False
+            if all(not isinstance(v, (dict, list)) for v in wanted):
+                return sorted(map(str, wanted)) == sorted(map(str, current))
+            return all(self._matches(w, c, subset) for w, c in zip(wanted, current))
+        return wanted == current
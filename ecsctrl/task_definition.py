@@ -0,0 +1,139 @@
+from typing import Optional
+
+import click
+
+# fields describe_task_definition returns that are not part of register payload
+RESPONSE_ONLY_FIELDS = [
+    "taskDefinitionArn",
+    "revision",
+    "status",
+    "requiresAttributes",
+    "compatibilities",
+    "registeredAt",
+    "registeredBy",
+    "deregisteredAt",
+]
+
+# values filled in by ECS when a field is omitted in register payload
+CONTAINER_DEFAULTS = {
+    "essential": True,
+    "cpu": 0,
+}
+
+PORT_MAPPING_DEFAULTS = {
+    "protocol": "tcp",
+}
+
+NAMED_LISTS = {
+    "environment": "name",
+    "secrets": "name",
+    "tags": "key",
+    "ulimits": "name",
+    "volumes": "name",
+}
+
+
+def _drop_empty(value):
+    if isinstance(value, dict):
+        value = {k: _drop_empty(v) for k, v in value.items()}
+        return {k: v for k, v in value.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [_drop_empty(v) for v in value]
+    return value
+
+
+def _sort_named_lists(value):
+    if isinstance(value, dict):
+        result = {}
+        for k, v in value.items():
+            v = _sort_named_lists(v)
+            if k in NAMED_LISTS and isinstance(v, list):
+                sort_key = NAMED_LISTS[k]
+                v = sorted(v, key=lambda i: str(i.get(sort_key)))
+            result[k] = v
+        return result
+    if isinstance(value, list):
+        return [_sort_named_lists(v) for v in value]
+    return value
+
+
+def _without_defaults(value: dict, defaults: dict) -> dict:
+    return {k: v for k, v in value.items() if defaults.get(k, object()) != v}
+
+
+def normalize_task_definition(payload: dict) -> dict:
+    payload = {k: v for k, v in payload.items() if k not in RESPONSE_ONLY_FIELDS}
+    network_mode = payload.get("networkMode")
+
+    containers = []
+    for container in payload.get("containerDefinitions", []):
+        container = _without_defaults(container, CONTAINER_DEFAULTS)
+        port_mappings = []
+        for port_mapping in container.get("portMappings", []):
+            port_mapping = _without_defaults(port_mapping, PORT_MAPPING_DEFAULTS)
+            host_port = port_mapping.get("hostPort")
+            # host port is set to container port in awsvpc and host network modes
+            if host_port == 0 or (
+                network_mode in ("awsvpc", "host")
+                and host_port == port_mapping.get("containerPort")
+            ):
+                port_mapping.pop("hostPort")
+            port_mappings.append(port_mapping)
+        if port_mappings:
+            container["portMappings"] = port_mappings
+        containers.append(container)
+
+    if containers:
+        payload["containerDefinitions"] = sorted(
+            containers, key=lambda c: str(c.get("name"))
+        )
+
+    for field in ["cpu", "memory"]:
+        if payload.get(field) is not None:
+            payload[field] = str(payload[field])
+
+    return _sort_named_lists(_drop_empty(payload))
+
+
+class TaskDefinitionRegistrar:
+    def __init__(self, boto_client) -> None:
+        self.boto_client = boto_client
+
+    def register(self, spec: dict, skip_unchanged: bool = False) -> str:
+        task_family = spec.get("family", "N/A")
+
+        if skip_unchanged:
+            task_definition_arn = self.find_unchanged(spec)
+            if task_definition_arn:
+                click.echo(
+                    f"🗂 Task definition {task_family} is unchanged, using {task_definition_arn}."
+                )
+                return task_definition_arn
+
+        click.echo(f"🗂 Registering task definition {task_family}.")
+        response = self.boto_client.call("register_task_definition", **spec)
+        task_definition_arn = response["taskDefinition"]["taskDefinitionArn"]
+        click.echo(f"\t✅ done, task definition arn: {task_definition_arn}.")
+        return task_definition_arn
+
+    def find_unchanged(self, spec: dict) -> Optional[str]:
+        from botocore.exceptions import ClientError
+
+        try:
+            response = self.boto_client.call(
+                "describe_task_definition",
+                taskDefinition=spec["family"],
+                include=["TAGS"],
+            )
+        except ClientError:
+            # family does not exist yet
+            return None
+
+        current = response.get("taskDefinition")
+        if not current or current.get("status") != "ACTIVE":
+            return None
+
+        current = {**current, "tags": response.get("tags", [])}
+        if normalize_task_definition(current) != normalize_task_definition(spec):
+            return None
+        return current["taskDefinitionArn"]
@@ -0,0 +1,77 @@
+import logging
+import os
+from threading import Lock
+
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    Undefined,
+    make_logging_undefined,
+)
+from jinja2.exceptions import TemplateNotFound
+from jinja2.utils import open_if_exists
+
+logger = logging.getLogger(__name__)
+
+
+class JinjaLoader(FileSystemLoader):
+    def split_template_path(self, template):
+        # based on https://github.com/pallets/jinja/blob/ca8b0b0287e320fe1f4a74f36910ef7ae3303d99/src/jinja2/loaders.py#L19
+        pieces = []
+        for piece in template.split("/"):
+            if piece and piece != ".":
+                pieces.append(piece)
+        return pieces
+
+    def get_source(self, environment, template):
+        # based on https://github.com/pallets/jinja/blob/ca8b0b0287e320fe1f4a74f36910ef7ae3303d99/src/jinja2/loaders.py#L174
+        pieces = self.split_template_path(template)
+        for searchpath in self.searchpath:
+            filename = os.path.join(searchpath, *pieces)
+            f = open_if_exists(filename)
+            if f is None:
+                continue
+            try:
+                contents = f.read().decode(self.encoding)
+            finally:
+                f.close()
+
+            mtime = os.path.getmtime(filename)
+
+            def uptodate():
+                try:
+                    return os.path.getmtime(filename) == mtime
+                except OSError:
+                    return False
+
+            return contents, filename, uptodate
+        raise TemplateNotFound(template)
+
+
+LoggingUndefined = make_logging_undefined(logger=logger, base=Undefined)
+
+
+_environments = {}
+_environments_lock = Lock()
+
+
+def get_environment(base_dir: str) -> Environment:
+    # one environment per spec directory, so templates and includes are compiled once per process
+    with _environments_lock:
+        if base_dir not in _environments:
+            bytecode_cache = None
+            # ECSCTRL_JINJA_CACHE_DIR keeps compiled templates between runs,
+            # they are invalidated by jinja when template source checksum changes
+            cache_dir = os.environ.get("ECSCTRL_JINJA_CACHE_DIR")
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+                bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+            _environments[base_dir] = Environment(
+                loader=JinjaLoader(base_dir),
+                undefined=LoggingUndefined,
+                bytecode_cache=bytecode_cache,
+                auto_reload=True,
+            )
+        return _environments[base_dir]
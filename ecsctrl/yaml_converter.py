@@ -1,8 +1,6 @@
-from functools import partial
+from functools import lru_cache, partial
 from typing import Dict, List
 
-import yaml
-
 from .loader import SpecFileLoader
 
 TASK_DEFINITION = "taskDefinition"
@@ -68,30 +66,56 @@ TRANSFORMATIONS = {
 }
 
 
-def _apply_function_to_path(obj: dict, path: str, function: callable):
-    exploded_path = path.split(".")
-    next_level = exploded_path[0]
+class TransformationTree:
+    # TRANSFORMATIONS paths compiled into a trie of path segments, so all rules
+    # are applied in one walk; a node's functions run before its children's
+    def __init__(self) -> None:
+        self.functions = []
+        self.children = {}
+
+    @classmethod
+    def compile(cls, transformations: dict) -> "TransformationTree":
+        root = cls()
+        for path, function in transformations.items():
+            node = root
+            for segment in path.split("."):
+                node = node.children.setdefault(segment, cls())
+            node.functions.append(function)
+        return root
+
+    def apply(self, obj):
+        for segment, child in self.children.items():
+            if segment == "*" and isinstance(obj, list):
+                for next_obj in obj:
+                    child.apply(next_obj)
+            elif isinstance(obj, dict) and segment in obj:
+                for function in child.functions:
+                    obj[segment] = function(obj[segment])
+                child.apply(obj[segment])
+        return obj
+
+
+@lru_cache(maxsize=None)
+def compiled_transformations(file_type: str) -> TransformationTree:
+    return TransformationTree.compile(TRANSFORMATIONS[file_type])
 
-    if len(exploded_path) > 1:
-        next_path = ".".join(exploded_path[1:])
-        if next_level == "*" and isinstance(obj, list):
-            for next_obj in obj:
-                _apply_function_to_path(next_obj, next_path, function)
-        elif isinstance(obj, dict) and next_level in obj:
-            _apply_function_to_path(obj[next_level], next_path, function)
 
-    if len(exploded_path) == 1 and next_level in obj:
-        obj[next_level] = function(obj[next_level])
+def yaml_data_to_dict(obj: dict, file_type: str):
+    return compiled_transformations(file_type).apply(obj)
 
 
-def yaml_data_to_dict(obj: dict, file_type: str):
-    for path, function in TRANSFORMATIONS[file_type].items():
-        _apply_function_to_path(obj, path, function)
-    return obj
+def yaml_loader():
+    import yaml
+
+    # LibYAML based loader is several times faster, PyYAML may be built without it
+    return getattr(yaml, "CLoader", yaml.Loader)
+
 
+def yaml_to_dict(yaml_contents: str, file_type: str, loader=None):
+    import yaml
 
-def yaml_to_dict(yaml_contents: str, file_type: str):
-    return yaml_data_to_dict(yaml.load(yaml_contents, Loader=yaml.Loader), file_type)
+    loader = loader or yaml_loader()
+    return yaml_data_to_dict(yaml.load(yaml_contents, Loader=loader), file_type)
 
 
 def yaml_file_to_dict(
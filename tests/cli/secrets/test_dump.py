@@ -0,0 +1,85 @@
+from unittest import mock
+
+from click.testing import CliRunner
+
+from ecsctrl.cli import cli
+
+
+def describe_parameters(**kwargs):
+    names = [f"prod-secret-{n:02}" for n in range(12)] + ["dev-secret"]
+    return {"Parameters": [{"Name": name} for name in names]}
+
+
+def get_parameters(Names, WithDecryption):
+    return {
+        "Parameters": [
+            {"Name": name, "Value": f"value of {name}", "Type": "SecureString"}
+            for name in reversed(Names)
+        ]
+    }
+
+
+@mock.patch("boto3.client")
+def test_dump(boto_mock, tmp_path):
+    client_mock = mock.Mock()
+    client_mock.describe_parameters.side_effect = describe_parameters
+    client_mock.get_parameters.side_effect = get_parameters
+    boto_mock.return_value = client_mock
+    target_file = tmp_path / "secrets.yaml"
+
+    runner = CliRunner()
+    params = ["secrets", "dump", "--filter", "prod-.*", str(target_file)]
+    result = runner.invoke(cli, params, catch_exceptions=False)
+
+    assert result.exit_code == 0
+    client_mock.describe_parameters.assert_called_once_with(
+        MaxResults=50,
+        ParameterFilters=[{"Key": "Name", "Option": "BeginsWith", "Values": ["prod-"]}],
+    )
+    assert [len(c.kwargs["Names"]) for c in client_mock.get_parameters.mock_calls] == [
+        10,
+        2,
+    ]
+    assert target_file.read_text().splitlines()[:4] == [
+        "# Dumped from `prod-secret-00`:",
+        "prod-secret-00: value of prod-secret-00",
+        "",
+        "# Dumped from `prod-secret-01`:",
+    ]
+    assert "dev-secret" not in target_file.read_text()
+
+
+@mock.patch("boto3.client")
+def test_incremental_dump_decrypts_only_changed_secrets(boto_mock, tmp_path):
+    versions = {"db-password": 1, "api-key": 1}
+
+    def describe_parameters(**kwargs):
+        return {
+            "Parameters": [
+                {"Name": name, "Type": "SecureString", "Version": version}
+                for name, version in versions.items()
+            ]
+        }
+
+    client_mock = mock.Mock()
+    client_mock.describe_parameters.side_effect = describe_parameters
+    client_mock.get_parameters.side_effect = get_parameters
+    boto_mock.return_value = client_mock
+    target_file = tmp_path / "secrets.yaml"
+    params = ["secrets", "dump", "--incremental", str(target_file)]
+
+    runner = CliRunner()
+    result = runner.invoke(cli, params, catch_exceptions=False)
+    assert result.exit_code == 0
+    first_dump = target_file.read_text()
+
+    client_mock.get_parameters.reset_mock()
+    versions["api-key"] = 2
+    result = runner.invoke(cli, params, catch_exceptions=False)
+
+    assert result.exit_code == 0
+    client_mock.get_parameters.assert_called_once_with(
+        Names=["api-key"], WithDecryption=True
+    )
+    assert target_file.read_text() == first_dump
+    assert "Kept unchanged secret db-password" in result.output
@@ -0,0 +1,143 @@
+from unittest import mock
+
+import pytest
+from botocore.exceptions import ClientError
+from click.testing import CliRunner
+
+from ecsctrl.cli import cli
+from tests.data_files import get_file_path
+
+
+@mock.patch("boto3.client")
+def test_store(boto_mock):
+    client_mock = mock.Mock()
+    client_mock.put_parameter.return_value = {"Version": 2}
+    boto_mock.return_value = client_mock
+
+    runner = CliRunner()
+    params = ["secrets", "store"]
+    params += ["-j", get_file_path("tf-output.json")]
+    params += [get_file_path("secrets.yaml")]
+    result = runner.invoke(cli, params, catch_exceptions=False)
+
+    assert result.exit_code == 0
+    assert client_mock.put_parameter.call_count == 3
+    client_mock.put_parameter.assert_any_call(
+        Name="test-API_URL",
+        Overwrite=True,
+        Tier="Intelligent-Tiering",
+        Value="https://api.example.com",
+        Type="String",
+        Description="Public API address",
+    )
+    client_mock.get_parameters.assert_not_called()
+
+
+@mock.patch("boto3.client")
+def test_store_skip_unchanged(boto_mock):
+    client_mock = mock.Mock()
+    client_mock.get_parameters.return_value = {
+        "Parameters": [
+            {
+                "Name": "test-DATABASE_PASSWORD",
+                "Value": "5w55ARXYbM3vUSVH",
+                "Type": "SecureString",
+            },
+            {
+                "Name": "test-API_URL",
+                "Value": "https://api.example.com",
+                "Type": "String",
+            },
+        ]
+    }
+    client_mock.describe_parameters.return_value = {
+        "Parameters": [{"Name": "test-API_URL", "Description": "Old description"}]
+    }
+    client_mock.put_parameter.return_value = {"Version": 2}
+    boto_mock.return_value = client_mock
+
+    runner = CliRunner()
+    params = ["secrets", "store", "--skip-unchanged"]
+    params += ["-j", get_file_path("tf-output.json")]
+    params += [get_file_path("secrets.yaml")]
+    result = runner.invoke(cli, params, catch_exceptions=False)
+
+    assert result.exit_code == 0
+    client_mock.get_parameters.assert_called_once_with(
+        Names=["test-DATABASE_PASSWORD", "test-SESSION_SECRET_KEY", "test-API_URL"],
+        WithDecryption=True,
+    )
+    assert [c.kwargs["Name"] for c in client_mock.put_parameter.mock_calls] == [
+        "test-SESSION_SECRET_KEY",
+        "test-API_URL",
+    ]
+    assert "1 created, 1 updated, 1 unchanged." in result.output
+
+
+@mock.patch("boto3.client")
+def test_store_reports_failures_in_spec_order(boto_mock):
+    def put_parameter(Name, **kwargs):
+        if Name == "test-DATABASE_PASSWORD":
+            raise ClientError({"Error": {"Code": "AccessDeniedException"}}, "")
+        return {"Version": 2}
+
+    client_mock = mock.Mock()
+    client_mock.put_parameter.side_effect = put_parameter
+    boto_mock.return_value = client_mock
+
+    runner = CliRunner()
+    params = ["secrets", "store", "--workers", "3", "--tps", "100"]
+    params += ["-j", get_file_path("tf-output.json")]
+    params += [get_file_path("secrets.yaml")]
+    result = runner.invoke(cli, params, catch_exceptions=False)
+
+    assert result.exit_code == 1
+    assert client_mock.put_parameter.call_count == 3
+    stored = [line for line in result.output.splitlines() if "Storing" in line]
+    assert stored == [
+        "🔑 Storing secret test-DATABASE_PASSWORD.",
+        "🔑 Storing secret test-SESSION_SECRET_KEY.",
+        "🔑 Storing secret test-API_URL.",
+    ]
+    assert "1 secret/s/ failed to store" in result.output
+
+
+def test_store_dry_run_output_follows_spec_order():
+    runner = CliRunner()
+    params = ["--dry-run", "secrets", "store"]
+    params += ["-j", get_file_path("tf-output.json")]
+    params += [get_file_path("secrets.yaml")]
+    result = runner.invoke(cli, params, catch_exceptions=False)
+
+    assert result.exit_code == 0
+    lines = [
+        line
+        for line in result.output.splitlines()
+        if line.startswith(("🔑 Storing secret", "🧸 BOTO: Would call"))
+    ]
+    assert lines == [
+        line
+        for name in [
+            "test-DATABASE_PASSWORD",
+            "test-SESSION_SECRET_KEY",
+            "test-API_URL",
+        ]
+        for line in [
+            f"🔑 Storing secret {name}.",
+            "🧸 BOTO: Would call `ssm:put_parameter` with {",
+        ]
+    ]
+
+
+@pytest.mark.parametrize(
+    "option, value", [("--workers", "0"), ("--tps", "0"), ("--tps", "-1")]
+)
+def test_store_rejects_out_of_range_options(option, value):
+    runner = CliRunner()
+    params = ["secrets", "store", option, value]
+    params += ["-j", get_file_path("tf-output.json")]
+    params += [get_file_path("secrets.yaml")]
+    result = runner.invoke(cli, params)
+
+    assert result.exit_code == 2
+    assert f"Invalid value for '{option}'" in result.output
@@ -1,3 +1,4 @@
+import json
 from unittest import mock
 
 from click.testing import CliRunner
@@ -133,3 +134,42 @@ def test_update(boto_mock):
     )
     client_mock.update_service.assert_called_once_with(**expected_api_params)
     client_mock.create_service.assert_not_called()
+
+
+@mock.patch("boto3.client")
+def test_wait_with_json_output_writes_only_json_to_stdout(boto_mock):
+    client_mock = mock.Mock()
+    client_mock.describe_services.return_value = {
+        "services": [
+            {
+                "serviceArn": "arn",
+                "serviceName": "web",
+                "status": "ACTIVE",
+                "taskDefinition": "arn:aws:ecs:eu-west-1:1:task-definition/ecs-test-web:1",
+                "desiredCount": 1,
+                "runningCount": 1,
+                "pendingCount": 0,
+                "deployments": [{"status": "PRIMARY", "rolloutState": "COMPLETED"}],
+            }
+        ]
+    }
+    client_mock.update_service.return_value = {"service": {"serviceArn": "arn"}}
+    client_mock.list_tasks.return_value = {"taskArns": []}
+    boto_mock.return_value = client_mock
+
+    try:
+        runner = CliRunner(mix_stderr=False)
+    except TypeError:
+        # click >= 8.2 always keeps stderr separate
+        runner = CliRunner()
+    params = ["service", "create-or-update", "--wait", "--output", "json"]
+    params += ["-j", get_file_path("tf-output.json")]
+    params += [get_file_path("service.yaml")]
+    result = runner.invoke(cli, params, catch_exceptions=False)
+
+    assert result.exit_code == 0
+    records = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [r["event"] for r in records] == ["service", "done"]
+    assert records[0]["state"] == "settled"
+    assert "Updating service web" in result.stderr
+    client_mock.update_service.assert_called_once()
@@ -1,3 +1,4 @@
+import threading
 from unittest import mock
 
 from click.testing import CliRunner
@@ -223,3 +224,125 @@ def test_update(boto_mock):
     )
     client_mock.update_service.assert_called_once_with(**expected_service_api_params)
     client_mock.create_service.assert_not_called()
+
+
+@mock.patch("boto3.client")
+def test_update_unchanged_service(boto_mock):
+    task_definition_arn = (
+        "arn:aws:ecs:ap-northeast-1:448965722616:task-definition/web:123"
+    )
+    client_mock = mock.Mock()
+    client_mock.register_task_definition.return_value = {
+        "taskDefinition": {"taskDefinitionArn": task_definition_arn}
+    }
+    client_mock.describe_services.return_value = {
+        "services": [
+            {
+                "serviceArn": "arn",
+                "serviceName": "web",
+                "status": "ACTIVE",
+                "taskDefinition": task_definition_arn,
+                "desiredCount": 1,
+                "runningCount": 1,
+                "pendingCount": 0,
+                "enableECSManagedTags": True,
+                "propagateTags": "TASK_DEFINITION",
+                "loadBalancers": [
+                    {
+                        "targetGroupArn": "arn:aws:elasticloadbalancing:eu-west-1:327376576235:targetgroup/web/74c9f6cd45cab21",
+                        "containerName": "web",
+                        "containerPort": 80,
+                    }
+                ],
+                "deploymentConfiguration": {
+                    "maximumPercent": 200,
+                    "minimumHealthyPercent": 50,
+                    "deploymentCircuitBreaker": {"enable": True, "rollback": False},
+                },
+                "networkConfiguration": {
+                    "awsvpcConfiguration": {
+                        "assignPublicIp": "DISABLED",
+                        "subnets": [
+                            "subnet-d1be0e0ff5ec21d55",
+                            "subnet-935d90f551003a326",
+                            "subnet-280191fd831969f80",
+                        ],
+                        "securityGroups": [
+                            "sg-f962f180b78b1e1ce",
+                            "sg-694824e7b602c0b79",
+                        ],
+                    }
+                },
+                "deployments": [{"status": "PRIMARY", "rolloutState": "COMPLETED"}],
+            }
+        ]
+    }
+    boto_mock.return_value = client_mock
+
+    runner = CliRunner()
+    params = ["service", "deploy", "--wait"]
+    params += ["-j", get_file_path("tf-output.json")]
+    params += [get_file_path("task-definition.yaml")]
+    params += [get_file_path("service.yaml")]
+    result = runner.invoke(cli, params, catch_exceptions=False)
+
+    assert result.exit_code == 0
+    assert "Service web is unchanged" in result.output
+    assert "All done" in result.output
+    client_mock.update_service.assert_not_called()
+    client_mock.describe_services.assert_called_once()
+
+
+@mock.patch("boto3.client")
+def test_describe_services_overlaps_registration(boto_mock):
+    described = threading.Event()
+
+    def register_task_definition(**kwargs):
+        assert described.wait(timeout=5)
+        return {"taskDefinition": {"taskDefinitionArn": "arn:task-definition/web:2"}}
+
+    def describe_services(**kwargs):
+        described.set()
+        return {"services": []}
+
+    client_mock = mock.Mock()
+    client_mock.register_task_definition.side_effect = register_task_definition
+    client_mock.describe_services.side_effect = describe_services
+    client_mock.create_service.return_value = {"service": {"serviceArn": "arn"}}
+    boto_mock.return_value = client_mock
+
+    runner = CliRunner()
+    params = ["service", "deploy"]
+    params += ["-j", get_file_path("tf-output.json")]
+    params += [get_file_path("task-definition.yaml")]
+    params += [get_file_path("service.yaml")]
+    result = runner.invoke(cli, params, catch_exceptions=False)
+
+    assert result.exit_code == 0
+    assert (
+        client_mock.create_service.call_args.kwargs["taskDefinition"]
+        == "arn:task-definition/web:2"
+    )
+
+
+def test_dry_run_prints_calls_in_order(tmp_path):
+    # Project tag is dropped as tf-output.json has no project name to validate
+    with open(get_file_path("task-definition.yaml")) as f:
+        task_definition = "".join(line for line in f if "Project:" not in line)
+    task_definition_file = tmp_path / "task-definition.yaml"
+    task_definition_file.write_text(task_definition)
+
+    runner = CliRunner()
+    params = ["--dry-run", "service", "deploy"]
+    params += ["-j", get_file_path("tf-output.json")]
+    params += [str(task_definition_file), get_file_path("service.yaml")]
+    result = runner.invoke(cli, params, catch_exceptions=False)
+
+    assert result.exit_code == 0
+    boto_lines = [line for line in result.output.splitlines() if "BOTO" in line]
+    assert boto_lines[:4] == [
+        "🧸 BOTO: Would call `ecs:register_task_definition` with {",
+        "✅ BOTO: Function `ecs:register_task_definition` parameter validation passed.",
+        "🧸 BOTO: Would call `ecs:describe_services` with {",
+        "✅ BOTO: Function `ecs:describe_services` parameter validation passed.",
+    ]
@@ -11,6 +11,7 @@ from tests.data_files import get_file_path
 def test_update(boto_mock):
     mocked_api_response = {"service": {"serviceArn": "arn"}}
     client_mock = mock.Mock()
+    client_mock.describe_services.return_value = {"services": []}
     client_mock.update_service.return_value = mocked_api_response
     boto_mock.return_value = client_mock
 
@@ -1,5 +1,6 @@
 from unittest import mock
 
+from botocore.exceptions import ClientError
 from click.testing import CliRunner
 
 from ecsctrl.cli import cli
@@ -60,3 +61,114 @@ def test_register(boto_mock):
 
     assert result.exit_code == 0
     client_mock.register_task_definition.assert_called_once_with(**expected_api_params)
+
+
+@mock.patch("boto3.client")
+def test_register_and_update_services_in_clusters(boto_mock):
+    task_definition_arn = (
+        "arn:aws:ecs:eu-west-1:327376576235:task-definition/ecs-test-web:36"
+    )
+    client_mock = mock.Mock()
+    client_mock.register_task_definition.return_value = {
+        "taskDefinition": {"taskDefinitionArn": task_definition_arn}
+    }
+    client_mock.list_services.return_value = {"serviceArns": ["web", "worker"]}
+    client_mock.describe_services.return_value = {
+        "services": [
+            {
+                "serviceArn": name,
+                "serviceName": name,
+                "status": "ACTIVE",
+                "taskDefinition": "arn:aws:ecs:eu-west-1:327376576235:task-definition/ecs-test-web:35",
+            }
+            for name in ["web", "worker"]
+        ]
+    }
+
+    def update_service(cluster, service, **kwargs):
+        if (cluster, service) == ("b", "worker"):
+            raise ClientError({"Error": {"Code": "ServiceNotActiveException"}}, "")
+        return {"service": {"serviceArn": service}}
+
+    client_mock.update_service.side_effect = update_service
+    boto_mock.return_value = client_mock
+
+    runner = CliRunner()
+    params = ["task-definition", "register"]
+    params += ["-j", get_file_path("tf-output.json")]
+    params += ["-c", "a", "-c", "b"]
+    params += [get_file_path("task-definition.yaml")]
+    result = runner.invoke(cli, params, catch_exceptions=False)
+
+    assert result.exit_code == 1
+    assert client_mock.update_service.call_count == 4
+    assert "Service worker in cluster b failed to update" in result.output
+
+
+def describe_response(task_definition_spec):
+    container = dict(task_definition_spec["containerDefinitions"][0])
+    container["cpu"] = 0
+    container["environment"] = list(reversed(container["environment"]))
+    container["portMappings"] = [
+        {"containerPort": 80, "hostPort": 80, "protocol": "tcp"}
+    ]
+    container["mountPoints"] = []
+    return {
+        "taskDefinition": {
+            **{k: v for k, v in task_definition_spec.items() if k != "tags"},
+            "containerDefinitions": [container],
+            "taskDefinitionArn": "arn:aws:ecs:eu-west-1:327376576235:task-definition/ecs-test-web:35",
+            "revision": 35,
+            "status": "ACTIVE",
+            "compatibilities": ["EC2", "FARGATE"],
+            "requiresAttributes": [{"name": "ecs.capability.task-eni"}],
+        },
+        "tags": task_definition_spec["tags"],
+    }
+
+
+def register_with_skip_unchanged(client_mock, boto_mock):
+    client_mock.register_task_definition.return_value = {
+        "taskDefinition": {
+            "taskDefinitionArn": "arn:aws:ecs:eu-west-1:327376576235:task-definition/ecs-test-web:36"
+        }
+    }
+    boto_mock.return_value = client_mock
+
+    runner = CliRunner()
+    params = ["task-definition", "register", "--skip-unchanged"]
+    params += ["-j", get_file_path("tf-output.json")]
+    params += [get_file_path("task-definition.yaml")]
+    return runner.invoke(cli, params, catch_exceptions=False)
+
+
+@mock.patch("boto3.client")
+def test_register_skips_unchanged_task_definition(boto_mock):
+    client_mock = mock.Mock()
+    register_with_skip_unchanged(client_mock, boto_mock)
+    spec = client_mock.register_task_definition.call_args.kwargs
+
+    client_mock.reset_mock()
+    client_mock.describe_task_definition.return_value = describe_response(spec)
+    result = register_with_skip_unchanged(client_mock, boto_mock)
+
+    assert result.exit_code == 0
+    client_mock.register_task_definition.assert_not_called()
+    assert "ecs-test-web:35" in result.output
+
+
+@mock.patch("boto3.client")
+def test_register_changed_task_definition(boto_mock):
+    client_mock = mock.Mock()
+    register_with_skip_unchanged(client_mock, boto_mock)
+    spec = client_mock.register_task_definition.call_args.kwargs
+
+    client_mock.reset_mock()
+    response = describe_response(spec)
+    response["taskDefinition"]["memory"] = "2048"
+    client_mock.describe_task_definition.return_value = response
+    result = register_with_skip_unchanged(client_mock, boto_mock)
+
+    assert result.exit_code == 0
+    client_mock.register_task_definition.assert_called_once()
+    assert "ecs-test-web:36" in result.output
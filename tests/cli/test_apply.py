@@ -0,0 +1,210 @@
+from unittest import mock
+
+import click
+import pytest
+from botocore.exceptions import ClientError
+from click.testing import CliRunner
+
+from ecsctrl.apply import ApplyPlan, DependencyGraph
+from ecsctrl.cli import cli
+from ecsctrl.yaml_converter import SERVICE, TASK_DEFINITION
+from tests.data_files import get_file_path
+
+
+@mock.patch("boto3.client")
+def test_apply(boto_mock):
+    task_definition_arn = (
+        "arn:aws:ecs:eu-west-1:327376576235:task-definition/ecs-test-web:36"
+    )
+    client_mock = mock.Mock()
+    client_mock.put_parameter.return_value = {"Version": 1}
+    client_mock.register_task_definition.return_value = {
+        "taskDefinition": {"taskDefinitionArn": task_definition_arn}
+    }
+    client_mock.describe_services.return_value = {
+        "services": [{"serviceName": "web", "status": "ACTIVE"}]
+    }
+    client_mock.update_service.return_value = {"service": {"serviceArn": "arn"}}
+    boto_mock.return_value = client_mock
+
+    runner = CliRunner()
+    params = ["apply"]
+    params += ["-j", get_file_path("tf-output.json")]
+    params += [get_file_path("apply.yaml")]
+    result = runner.invoke(cli, params, catch_exceptions=False)
+
+    assert result.exit_code == 0
+    assert client_mock.put_parameter.call_count == 3
+    client_mock.register_task_definition.assert_called_once()
+    client_mock.describe_services.assert_called_once_with(
+        cluster="ecs-test", services=["web"]
+    )
+    client_mock.create_service.assert_not_called()
+    assert (
+        client_mock.update_service.call_args.kwargs["taskDefinition"]
+        == task_definition_arn
+    )
+
+
+@mock.patch("boto3.client")
+def test_apply_skips_dependents_of_failed_resources(boto_mock):
+    client_mock = mock.Mock()
+    client_mock.put_parameter.return_value = {"Version": 1}
+    client_mock.register_task_definition.side_effect = ClientError(
+        {"Error": {"Code": "ClientException"}}, "RegisterTaskDefinition"
+    )
+    client_mock.describe_services.return_value = {"services": []}
+    boto_mock.return_value = client_mock
+
+    runner = CliRunner()
+    params = ["apply"]
+    params += ["-j", get_file_path("tf-output.json")]
+    params += [get_file_path("apply.yaml")]
+    result = runner.invoke(cli, params, catch_exceptions=False)
+
+    assert result.exit_code == 1
+    client_mock.create_service.assert_not_called()
+    assert "Skipped service ecs-test/web" in result.output
+
+
+def test_apply_plan_keeps_services_with_same_name_in_other_clusters():
+    boto_client = mock.Mock(dry_run=False)
+
+    def call(method, **kwargs):
+        if method == "describe_services":
+            return {"services": []}
+        if method == "create_service":
+            return {"service": {"serviceArn": f"{kwargs['cluster']}/web"}}
+
+    boto_client.call.side_effect = call
+    specs = [
+        ("staging.yaml", SERVICE, {"serviceName": "web", "cluster": "staging"}),
+        ("production.yaml", SERVICE, {"serviceName": "web", "cluster": "production"}),
+    ]
+
+    updated_services, failures, skipped = ApplyPlan(boto_client, specs).run()
+
+    assert updated_services == {
+        "staging": [("staging/web", "web")],
+        "production": [("production/web", "web")],
+    }
+    created = [
+        c.kwargs["cluster"]
+        for c in boto_client.call.call_args_list
+        if c.args[0] == "create_service"
+    ]
+    assert sorted(created) == ["production", "staging"]
+
+
+def test_apply_plan_rejects_duplicate_resources():
+    specs = [
+        ("a.yaml", TASK_DEFINITION, {"family": "web", "containerDefinitions": []}),
+        ("b.yaml", TASK_DEFINITION, {"family": "web", "containerDefinitions": []}),
+    ]
+
+    with pytest.raises(click.ClickException, match="task definition web"):
+        ApplyPlan(mock.Mock(dry_run=False), specs)
+
+
+def test_apply_rejects_max_workers_below_one():
+    runner = CliRunner()
+    params = ["apply", "--max-workers", "0", get_file_path("apply.yaml")]
+    result = runner.invoke(cli, params)
+
+    assert result.exit_code == 2
+    assert "Invalid value for '--max-workers'" in result.output
+
+
+@mock.patch("boto3.client")
+def test_apply_directory_skips_files_that_are_not_specs(boto_mock, tmp_path):
+    client_mock = mock.Mock()
+    client_mock.put_parameter.return_value = {"Version": 1}
+    boto_mock.return_value = client_mock
+    (tmp_path / "app-secrets.yaml").write_text(
+        "test-API_KEY: key\ntest-API_URL:\n  Value: https://api\n  Type: String\n"
+    )
+    (tmp_path / "docker-compose.yaml").write_text("services:\n  web:\n    image: web\n")
+    (tmp_path / "apply.yaml").write_text("secrets:\n  - app-secrets.yaml\n")
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["apply", str(tmp_path)], catch_exceptions=False)
+
+    assert result.exit_code == 0
+    assert "Skipped" in result.output and "docker-compose.yaml" in result.output
+    assert sorted(
+        c.kwargs["Name"] for c in client_mock.put_parameter.call_args_list
+    ) == ["test-API_KEY", "test-API_URL"]
+
+
+@mock.patch("boto3.client")
+def test_apply_rejects_invalid_secrets_before_applying(boto_mock, tmp_path):
+    client_mock = mock.Mock()
+    boto_mock.return_value = client_mock
+    (tmp_path / "secrets.yaml").write_text("test-API_KEY: key\ntest-LIST:\n  - a\n")
+    (tmp_path / "service.yaml").write_text("serviceName: web\ncluster: test\n")
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["apply", str(tmp_path)])
+
+    assert result.exit_code == 1
+    assert "test-LIST" in result.output
+    client_mock.put_parameter.assert_not_called()
+    client_mock.describe_services.assert_not_called()
+
+
+def test_dependency_graph_records_unexpected_errors_as_failures():
+    graph = DependencyGraph()
+    graph.add("broken", lambda results: {}["missing"])
+    graph.add("dependent", lambda results: "dependent", ["broken"])
+    graph.add("independent", lambda results: "independent")
+
+    results, failures, skipped = graph.run()
+
+    assert results == {"independent": "independent"}
+    assert isinstance(failures["broken"], KeyError)
+    assert skipped == ["dependent"]
+
+
+def test_apply_dry_run_prints_calls_in_order(tmp_path):
+    (tmp_path / "secrets.yaml").write_text("test-A: a\ntest-B: b\ntest-C: c\n")
+    (tmp_path / "service.yaml").write_text("serviceName: web\ncluster: test\n")
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["--dry-run", "apply", str(tmp_path)], catch_exceptions=False
+    )
+
+    assert result.exit_code == 0
+    calls = [line for line in result.output.splitlines() if "Would call" in line]
+    assert calls == [
+        "🧸 BOTO: Would call `ssm:put_parameter` with {",
+        "🧸 BOTO: Would call `ssm:put_parameter` with {",
+        "🧸 BOTO: Would call `ssm:put_parameter` with {",
+        "🧸 BOTO: Would call `ecs:describe_services` with {",
+        "🧸 BOTO: Would call `ecs:create_service` with {",
+    ]
+
+
+def test_apply_plan_skips_unchanged_services():
+    boto_client = mock.Mock(dry_run=False)
+    boto_client.call.return_value = {
+        "services": [
+            {
+                "serviceArn": "arn",
+                "serviceName": "web",
+                "status": "ACTIVE",
+                "desiredCount": 2,
+                "runningCount": 2,
+                "pendingCount": 0,
+                "deployments": [{"status": "PRIMARY", "rolloutState": "COMPLETED"}],
+            }
+        ]
+    }
+    specs = [
+        ("web.yaml", SERVICE, {"serviceName": "web", "cluster": "a", "desiredCount": 2})
+    ]
+
+    updated_services, failures, skipped = ApplyPlan(boto_client, specs).run()
+
+    assert (updated_services, failures, skipped) == ({}, {}, [])
+    assert [c.args[0] for c in boto_client.call.call_args_list] == ["describe_services"]
@@ -0,0 +1,11 @@
+import pytest
+
+from ecsctrl.boto_client import BotoClient
+
+
+@pytest.fixture(autouse=True)
+def clear_boto_clients():
+    BotoClient.clear_clients()
+    BotoClient.metrics.clear()
+    yield
+    BotoClient.clear_clients()
@@ -0,0 +1,135 @@
+from unittest import mock
+
+import pytest
+from botocore.exceptions import ClientError, ReadTimeoutError
+
+from ecsctrl.boto_client import BotoClient, DryBotoClient, TokenBucket
+
+
+def throttling_error():
+    return ClientError({"Error": {"Code": "ThrottlingException"}}, "DescribeServices")
+
+
+@mock.patch("ecsctrl.boto_client.sleep")
+@mock.patch("boto3.client")
+def test_call_retries_throttled_requests(boto_mock, sleep_mock):
+    client_mock = mock.Mock()
+    client_mock.describe_services.side_effect = [
+        throttling_error(),
+        throttling_error(),
+        {"services": []},
+    ]
+    boto_mock.return_value = client_mock
+    throttles = BotoClient.throttles[("ecs", "describe_services")]
+    retries = BotoClient.retries[("ecs", "describe_services")]
+
+    response = BotoClient("ecs").call("describe_services", services=["web"])
+
+    assert response == {"services": []}
+    assert client_mock.describe_services.call_count == 3
+    assert BotoClient.throttles[("ecs", "describe_services")] == throttles + 2
+    assert BotoClient.retries[("ecs", "describe_services")] == retries + 2
+    [row] = BotoClient.metrics.rows()
+    assert (row["service"], row["method"]) == ("ecs", "describe_services")
+    assert (row["calls"], row["retries"], row["throttles"]) == (1, 2, 2)
+
+
+@mock.patch("ecsctrl.boto_client.sleep")
+@mock.patch("boto3.client")
+def test_call_retries_server_errors_and_read_timeouts(boto_mock, sleep_mock):
+    client_mock = mock.Mock()
+    client_mock.describe_services.side_effect = [
+        ClientError(
+            {
+                "Error": {"Code": "ServiceUnavailableException"},
+                "ResponseMetadata": {"HTTPStatusCode": 503},
+            },
+            "DescribeServices",
+        ),
+        ClientError(
+            {"Error": {"Code": "Unknown"}, "ResponseMetadata": {"HTTPStatusCode": 500}},
+            "DescribeServices",
+        ),
+        ReadTimeoutError(endpoint_url="https://ecs"),
+        {"services": []},
+    ]
+    boto_mock.return_value = client_mock
+
+    response = BotoClient("ecs").call("describe_services", services=["web"])
+
+    assert response == {"services": []}
+    assert client_mock.describe_services.call_count == 4
+    [row] = BotoClient.metrics.rows()
+    assert (row["retries"], row["throttles"]) == (3, 0)
+
+
+@mock.patch("ecsctrl.boto_client.sleep")
+@mock.patch("boto3.client")
+def test_call_does_not_retry_other_errors(boto_mock, sleep_mock):
+    client_mock = mock.Mock()
+    client_mock.update_service.side_effect = ClientError(
+        {"Error": {"Code": "ServiceNotFoundException"}}, "UpdateService"
+    )
+    boto_mock.return_value = client_mock
+
+    with pytest.raises(ClientError):
+        BotoClient("ecs").call("update_service", service="web")
+
+    assert client_mock.update_service.call_count == 1
+    sleep_mock.assert_not_called()
+    assert BotoClient.metrics.rows()[0]["errors"] == 1
+
+
+@mock.patch("ecsctrl.boto_client.sleep")
+@mock.patch("ecsctrl.boto_client.monotonic", return_value=0)
+def test_token_bucket_waits_when_empty(monotonic_mock, sleep_mock):
+    bucket = TokenBucket(rate=2)
+
+    def advance(seconds):
+        monotonic_mock.return_value += seconds
+
+    sleep_mock.side_effect = advance
+
+    for _ in range(3):
+        bucket.acquire()
+
+    sleep_mock.assert_called_once_with(0.5)
+
+
+@mock.patch("boto3.client")
+def test_clients_are_shared_and_created_lazily(boto_mock):
+    ecs = BotoClient("ecs")
+    boto_mock.assert_not_called()
+
+    ecs.call("list_clusters")
+    BotoClient("ecs").call("list_clusters")
+    BotoClient("ssm").call("describe_parameters")
+
+    assert [c.args[0] for c in boto_mock.call_args_list] == ["ecs", "ssm"]
+    assert boto_mock.call_args.kwargs["config"].max_pool_connections == 50
+
+
+def test_dry_client_shares_service_models_and_shapes():
+    first = DryBotoClient("ecs")
+    second = DryBotoClient("ecs")
+
+    assert first.service_model is second.service_model
+    assert first._input_shape("list_clusters") is second._input_shape("list_clusters")
+
+
+def test_dry_client_stores_service_model_in_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("ECSCTRL_MODEL_CACHE_DIR", str(tmp_path))
+
+    json_model = DryBotoClient._load_json_model("ecs")
+
+    [cache_file] = tmp_path.iterdir()
+    assert cache_file.name.startswith("ecs-latest-")
+    assert DryBotoClient._load_json_model("ecs") == json_model
+
+
+def test_dry_client_validates_params():
+    client = DryBotoClient("ecs")
+
+    client.list_clusters(maxResults=10)
+    with pytest.raises(SystemExit):
+        client.list_clusters(maxResults="ten")
@@ -0,0 +1,43 @@
+import random
+
+from ecsctrl.dump import generate_var_lut, substitute_with_expressions
+
+
+def naive_substitute(key, vars_lut):
+    for var_value, var_name in vars_lut.items():
+        if var_value in key:
+            return key.replace(var_value, r"{{ " + var_name + r" }}")
+    return key
+
+
+def test_substitute_with_expressions_prefers_longest_value():
+    var_lut = generate_var_lut(
+        {"env": "prod", "app": {"name": "prod-api", "port": 80}, "region": "eu"}
+    )
+
+    assert (
+        substitute_with_expressions("/prod-api/eu/DB_PASSWORD", var_lut)
+        == "/{{ app.name }}/eu/DB_PASSWORD"
+    )
+    assert (
+        substitute_with_expressions("/prod/eu/DB_PASSWORD", var_lut)
+        == "/{{ env }}/eu/DB_PASSWORD"
+    )
+    assert substitute_with_expressions("/other/KEY", var_lut) == "/other/KEY"
+
+
+def test_substitute_with_expressions_matches_linear_scan():
+    rng = random.Random(1)
+    alphabet = "abc-/"
+
+    def word(max_length):
+        return "".join(rng.choice(alphabet) for _ in range(rng.randint(1, max_length)))
+
+    vars = {f"var{n}": word(5) for n in range(40)}
+    var_lut = generate_var_lut(vars)
+
+    for _ in range(500):
+        key = word(20)
+        assert substitute_with_expressions(key, var_lut) == naive_substitute(
+            key, dict(var_lut)
+        )
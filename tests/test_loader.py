@@ -0,0 +1,35 @@
+from unittest import mock
+
+from ecsctrl import templating
+from ecsctrl.loader import SpecFileLoader
+
+
+def test_spec_file_loader_reuses_compiled_templates(tmp_path):
+    (tmp_path / "common.yaml").write_text("env: {{ env_name }}\n")
+    (tmp_path / "spec.yaml").write_text('{% include "common.yaml" %}\nname: web\n')
+    spec_file = str(tmp_path / "spec.yaml")
+
+    get_source = templating.JinjaLoader.get_source
+
+    with mock.patch.object(
+        templating.JinjaLoader, "get_source", autospec=True, side_effect=get_source
+    ) as get_source_mock:
+        first = SpecFileLoader(spec_file, {"env_name": "prod"}).load()
+        second = SpecFileLoader(spec_file, {"env_name": "test"}).load()
+
+    assert first == "env: prod\nname: web"
+    assert second == "env: test\nname: web"
+    assert get_source_mock.call_count == 2
+
+
+def test_spec_file_loader_uses_bytecode_cache(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    spec_dir = tmp_path / "specs"
+    spec_dir.mkdir()
+    (spec_dir / "spec.yaml").write_text("name: {{ name }}\n")
+    monkeypatch.setenv("ECSCTRL_JINJA_CACHE_DIR", str(cache_dir))
+
+    result = SpecFileLoader(str(spec_dir / "spec.yaml"), {"name": "web"}).load()
+
+    assert result == "name: web"
+    assert len(list(cache_dir.iterdir())) == 1
@@ -0,0 +1,111 @@
+import json
+from unittest import mock
+
+from click.testing import CliRunner
+
+from ecsctrl.cli import cli
+from ecsctrl.metrics import CallMetrics, response_size
+from tests.data_files import get_file_path
+
+
+def make_metrics():
+    metrics = CallMetrics()
+    metrics.record("ecs", "describe_services", 0.5, 1200)
+    metrics.record("ecs", "describe_services", 1.5, 800, retries=1, throttles=1)
+    metrics.record("ssm", "put_parameter", 0.25, error=True)
+    return metrics
+
+
+def test_call_metrics_aggregates_per_method():
+    rows = make_metrics().rows()
+
+    assert rows[0] == {
+        "service": "ecs",
+        "method": "describe_services",
+        "calls": 2,
+        "errors": 0,
+        "retries": 1,
+        "throttles": 1,
+        "latencySum": 2.0,
+        "latencyMax": 1.5,
+        "responseBytes": 2000,
+    }
+    assert rows[1]["errors"] == 1
+
+
+def test_call_metrics_table():
+    lines = make_metrics().table()
+
+    assert lines[0].split() == [
+        "SERVICE",
+        "METHOD",
+        "CALLS",
+        "ERRORS",
+        "RETRIES",
+        "THROTTLES",
+        "AVG",
+        "MAX",
+        "TOTAL",
+        "BYTES",
+    ]
+    assert lines[1].split() == [
+        "ecs",
+        "describe_services",
+        "2",
+        "0",
+        "1",
+        "1",
+        "1.000s",
+        "1.500s",
+        "2.000s",
+        "2000",
+    ]
+
+
+def test_call_metrics_prometheus_textfile(tmp_path):
+    file_path = str(tmp_path / "ecsctrl.prom")
+
+    make_metrics().write(file_path)
+
+    with open(file_path) as f:
+        contents = f.read()
+    assert "# TYPE ecsctrl_api_calls_total counter" in contents
+    assert (
+        'ecsctrl_api_throttles_total{service="ecs",method="describe_services"} 1'
+        in contents
+    )
+    assert (
+        'ecsctrl_api_errors_total{service="ssm",method="put_parameter"} 1' in contents
+    )
+
+
+def test_response_size_reads_content_length():
+    response = {"ResponseMetadata": {"HTTPHeaders": {"content-length": "512"}}}
+
+    assert response_size(response) == 512
+    assert response_size({}) == 0
+
+
+@mock.patch("boto3.client")
+def test_cli_writes_metrics_file_and_stats(boto_mock, tmp_path):
+    client_mock = mock.Mock()
+    client_mock.register_task_definition.return_value = {
+        "taskDefinition": {"taskDefinitionArn": "arn:task-definition/web:2"},
+        "ResponseMetadata": {"HTTPHeaders": {"content-length": "100"}},
+    }
+    boto_mock.return_value = client_mock
+    metrics_file = str(tmp_path / "metrics.json")
+
+    runner = CliRunner()
+    params = ["--stats", "--metrics-file", metrics_file]
+    params += ["task-definition", "register"]
+    params += ["-j", get_file_path("tf-output.json")]
+    params += [get_file_path("task-definition.yaml")]
+    result = runner.invoke(cli, params, catch_exceptions=False)
+
+    assert result.exit_code == 0
+    assert "register_task_definition" in result.output
+    with open(metrics_file) as f:
+        [row] = json.load(f)["calls"]
+    assert row["method"] == "register_task_definition"
+    assert row["responseBytes"] == 100
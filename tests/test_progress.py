@@ -0,0 +1,68 @@
+import json
+
+from ecsctrl.progress import CompactProgress, JsonProgress, TextProgress
+
+
+def make_status(running_count=1, failures=0, critical=False):
+    return {
+        "cluster": "cluster",
+        "service": "web",
+        "taskDefinition": "td:2",
+        "desiredCount": 2,
+        "runningCount": running_count,
+        "pendingCount": 0,
+        "rolloutState": "FAILED" if critical else "IN_PROGRESS",
+        "minTaskAge": 60,
+        "tasks": [
+            {"taskArn": "task-1", "age": 10, "taskDefinitionArn": "td:2"},
+            {"taskArn": "task-2", "age": 600, "taskDefinitionArn": "td:1"},
+        ],
+        "failures": failures,
+        "critical": critical,
+    }
+
+
+def test_text_progress_reports_every_check():
+    lines = TextProgress().service_lines(make_status(failures=3))
+
+    assert len(lines) == 12
+    assert "\t😱 Running task count: 1" in lines
+    assert "\t😱 Task task-1 is to young (10s, 60s minimum)" in lines
+
+
+def test_compact_progress_prints_only_state_changes():
+    lines = []
+    progress = CompactProgress(lines.append)
+
+    progress.service(make_status(failures=3))
+    progress.service(make_status(failures=3))
+    progress.waiting(3, 5)
+    progress.waiting(3, 10)
+    progress.resumed(10, 20)
+    progress.service(make_status(running_count=2, failures=2))
+
+    assert lines == [
+        "⏳ cluster/web: 1/2 running, 0 pending, 1 starting, 1 outdated, rollout IN_PROGRESS",
+        "⏳ Waiting for things to settle (3 check/s/ failed)",
+        "⏳ cluster/web: 2/2 running, 0 pending, 1 starting, 1 outdated, rollout IN_PROGRESS",
+    ]
+
+
+def test_json_progress_emits_one_record_per_event():
+    lines = []
+    progress = JsonProgress(lines.append)
+
+    progress.service(make_status(failures=3))
+    progress.service(make_status(failures=3))
+    progress.service(make_status(failures=4, critical=True))
+    progress.failed(42)
+
+    records = [json.loads(line) for line in lines]
+    assert [(r["event"], r.get("state")) for r in records] == [
+        ("service", "in_progress"),
+        ("service", "failed"),
+        ("failed", None),
+    ]
+    assert records[0]["startingTasks"] == 1
+    assert records[0]["outdatedTasks"] == 1
+    assert records[2]["elapsed"] == 42
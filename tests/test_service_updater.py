@@ -0,0 +1,297 @@
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from ecsctrl.service_index import ServiceIndex
+from ecsctrl.service_updater import (
+    PollScheduler,
+    ServiceUpdater,
+    TaskDefinitionServiceUpdater,
+    WaitForUpdate,
+)
+
+
+def make_task(n, task_definition="td:1"):
+    return {
+        "taskArn": f"task-{n}",
+        "taskDefinitionArn": task_definition,
+        "createdAt": datetime.now(timezone.utc) - timedelta(seconds=3600),
+    }
+
+
+def test_describe_service_tasks_batches_and_paginates():
+    task_arns = [f"task-{n}" for n in range(150)]
+    boto_client = mock.Mock()
+
+    def call(method, **kwargs):
+        if method == "list_tasks":
+            if "nextToken" in kwargs:
+                return {"taskArns": task_arns[100:]}
+            return {"taskArns": task_arns[:100], "nextToken": "token"}
+        if method == "describe_tasks":
+            return {"tasks": [make_task(arn.split("-")[1]) for arn in kwargs["tasks"]]}
+
+    boto_client.call.side_effect = call
+    waiter = WaitForUpdate(boto_client, {})
+
+    tasks = waiter.describe_service_tasks("cluster", "web")
+
+    assert [t["taskArn"] for t in tasks] == task_arns
+    describe_calls = [
+        c for c in boto_client.call.call_args_list if c.args[0] == "describe_tasks"
+    ]
+    assert [len(c.kwargs["tasks"]) for c in describe_calls] == [100, 50]
+
+
+def test_poll_scheduler_backs_off_up_to_ceiling():
+    scheduler = PollScheduler(min_interval=5, max_interval=20, backoff=2, jitter=0)
+
+    intervals = [scheduler.next_interval() for _ in range(5)]
+
+    assert intervals == [5, 10, 20, 20, 20]
+
+
+def test_poll_scheduler_wakes_up_when_tasks_are_about_to_settle():
+    scheduler = PollScheduler(min_interval=5, max_interval=60, backoff=2, jitter=0)
+    scheduler.interval = 60
+
+    assert scheduler.next_interval(settle_in=12) == 12
+    assert scheduler.next_interval(settle_in=1) == 5
+
+
+def make_service(name, pending_count=0):
+    return {
+        "serviceName": name,
+        "taskDefinition": "td:1",
+        "desiredCount": 1,
+        "runningCount": 1,
+        "pendingCount": pending_count,
+        "deployments": [{"status": "PRIMARY", "rolloutState": "COMPLETED"}],
+    }
+
+
+@mock.patch("ecsctrl.service_updater.sleep")
+def test_wait_for_all_skips_settled_services(sleep_mock, monkeypatch):
+    monkeypatch.setenv("CI", "1")
+    rounds = {"web": [make_service("web")], "worker": [make_service("worker", 1)]}
+    described = []
+    boto_client = mock.Mock()
+
+    def call(method, **kwargs):
+        if method == "describe_services":
+            described.append(kwargs["services"])
+            return {"services": [rounds[name].pop(0) for name in kwargs["services"]]}
+        if method == "list_tasks":
+            return {"taskArns": []}
+
+    boto_client.call.side_effect = call
+    rounds["worker"].append(make_service("worker"))
+    waiter = WaitForUpdate(
+        boto_client, {"cluster": [("web", "web"), ("worker", "worker")]}
+    )
+
+    waiter.wait_for_all()
+
+    assert described == [["web", "worker"], ["worker"]]
+    sleep_mock.assert_called_once()
+
+
+def test_find_services_to_update_describes_pages_in_chunks():
+    service_arns = [f"service-{n}" for n in range(120)]
+    boto_client = mock.Mock()
+
+    def call(method, **kwargs):
+        if method == "list_services":
+            if "nextToken" in kwargs:
+                return {"serviceArns": service_arns[100:]}
+            return {"serviceArns": service_arns[:100], "nextToken": "token"}
+        if method == "describe_services":
+            return {
+                "services": [
+                    {
+                        "serviceArn": arn,
+                        "serviceName": arn,
+                        "status": "ACTIVE",
+                        "taskDefinition": f"task-definition/{'web' if arn.endswith('7') else 'other'}:1",
+                    }
+                    for arn in kwargs["services"]
+                ]
+            }
+
+    boto_client.call.side_effect = call
+    updater = TaskDefinitionServiceUpdater(
+        boto_client, "arn:task-definition/web:2", "cluster"
+    )
+
+    services = updater.find_services_to_update()
+
+    assert services == [(arn, arn) for arn in service_arns if arn.endswith("7")]
+    describe_calls = [
+        c for c in boto_client.call.call_args_list if c.args[0] == "describe_services"
+    ]
+    assert len(describe_calls) == 12
+    assert all(len(c.kwargs["services"]) <= 10 for c in describe_calls)
+
+
+def test_service_index_describes_new_and_matched_services(tmp_path):
+    service_arns = ["web", "worker", "cron"]
+    families = {"cron": "task-definition/cron:1"}
+    boto_client = mock.Mock()
+
+    def call(method, **kwargs):
+        if method == "list_services":
+            return {"serviceArns": list(service_arns)}
+        if method == "describe_services":
+            return {
+                "services": [
+                    {
+                        "serviceArn": arn,
+                        "serviceName": arn,
+                        "status": "ACTIVE",
+                        "taskDefinition": families.get(arn, "task-definition/web:1"),
+                    }
+                    for arn in kwargs["services"]
+                ]
+            }
+
+    boto_client.call.side_effect = call
+    index_file = str(tmp_path / "index.json")
+
+    def find_services():
+        updater = TaskDefinitionServiceUpdater(
+            boto_client,
+            "arn:task-definition/web:2",
+            "cluster",
+            ServiceIndex(index_file),
+        )
+        return updater.find_services_to_update()
+
+    assert find_services() == [("web", "web"), ("worker", "worker")]
+
+    boto_client.call.reset_mock()
+    service_arns.remove("worker")
+    service_arns.append("scheduler")
+    families["web"] = "task-definition/other:1"
+    families["cron"] = "task-definition/web:1"
+
+    assert find_services() == [("scheduler", "scheduler")]
+    describe_calls = [
+        c for c in boto_client.call.call_args_list if c.args[0] == "describe_services"
+    ]
+    assert [c.kwargs["services"] for c in describe_calls] == [["scheduler"], ["web"]]
+    assert (
+        ServiceIndex(index_file).get_services("cluster")["web"]["taskDefinition"]
+        == "task-definition/other:1"
+    )
+
+
+@mock.patch("boto3.client")
+def test_find_services_to_update_by_family_tag(boto_mock):
+    tagging_client = mock.Mock()
+    tagging_client.get_resources.return_value = {
+        "ResourceTagMappingList": [
+            {"ResourceARN": "arn:aws:ecs:eu-west-1:1:service/cluster/web"},
+            {"ResourceARN": "arn:aws:ecs:eu-west-1:1:service/other/web"},
+            {"ResourceARN": "arn:aws:ecs:eu-west-1:1:service/legacy"},
+        ]
+    }
+    boto_mock.return_value = tagging_client
+    boto_client = mock.Mock(dry_run=False)
+    boto_client.call.return_value = {
+        "services": [
+            {
+                "serviceArn": "arn:aws:ecs:eu-west-1:1:service/cluster/web",
+                "serviceName": "web",
+                "status": "ACTIVE",
+                "taskDefinition": "task-definition/web:1",
+            }
+        ]
+    }
+    updater = TaskDefinitionServiceUpdater(
+        boto_client, "arn:task-definition/web:2", "cluster", family_tag="TaskFamily"
+    )
+
+    services = updater.find_services_to_update()
+
+    assert services == [("arn:aws:ecs:eu-west-1:1:service/cluster/web", "web")]
+    assert boto_mock.call_args.args[0] == "resourcegroupstaggingapi"
+    tagging_client.get_resources.assert_called_once_with(
+        ResourceTypeFilters=["ecs:service"],
+        TagFilters=[{"Key": "TaskFamily", "Values": ["web"]}],
+        ResourcesPerPage=100,
+    )
+    boto_client.call.assert_called_once_with(
+        "describe_services",
+        cluster="cluster",
+        services=[
+            "arn:aws:ecs:eu-west-1:1:service/cluster/web",
+            "arn:aws:ecs:eu-west-1:1:service/legacy",
+        ],
+    )
+
+
+def test_service_updater_detects_unchanged_service():
+    updater = ServiceUpdater()
+    service_description = {
+        "status": "ACTIVE",
+        "taskDefinition": "arn:aws:ecs:eu-west-1:1:task-definition/web:3",
+        "desiredCount": 2,
+        "deploymentConfiguration": {"maximumPercent": 200, "alarms": {}},
+    }
+    payload = {
+        "cluster": "cluster",
+        "service": "web",
+        "taskDefinition": "web:3",
+        "desiredCount": 2,
+        "deploymentConfiguration": {"maximumPercent": 200},
+    }
+
+    assert updater.is_unchanged(payload, service_description)
+    assert not updater.is_unchanged({**payload, "desiredCount": 3}, service_description)
+    assert not updater.is_unchanged(
+        {**payload, "taskDefinition": "web"}, service_description
+    )
+    assert not updater.is_unchanged(
+        {**payload, "forceNewDeployment": True}, service_description
+    )
+
+
+def test_service_index_treats_malformed_file_as_empty(tmp_path):
+    index_file = tmp_path / "index.json"
+    for contents in ["[]", '{"clusters": []}', '{"clusters": {"cluster": 1}}']:
+        index_file.write_text(contents)
+
+        assert ServiceIndex(str(index_file)).get_services("cluster") is None
+
+
+def test_service_index_ignores_write_errors(tmp_path):
+    index_file = tmp_path / "not-a-directory"
+    index_file.write_text("")
+    index = ServiceIndex(str(index_file / "index.json"))
+
+    index.set_services("cluster", {"web": {}}, full_refresh=True)
+
+    assert index.get_services("cluster") == {"web": {}}
+
+
+def test_service_updater_detects_removed_nested_field():
+    updater = ServiceUpdater()
+    service_description = {
+        "status": "ACTIVE",
+        "networkConfiguration": {
+            "awsvpcConfiguration": {"subnets": ["s1"], "securityGroups": ["sg1"]}
+        },
+        "capacityProviderStrategy": [
+            {"capacityProvider": "FARGATE", "weight": 1, "base": 0}
+        ],
+    }
+    payload = {
+        "service": "web",
+        "networkConfiguration": {
+            "awsvpcConfiguration": {"subnets": ["s1"], "securityGroups": ["sg1"]}
+        },
+        "capacityProviderStrategy": [{"capacityProvider": "FARGATE", "weight": 1}],
+    }
+
+    assert updater.is_unchanged(payload, service_description)
+    payload["networkConfiguration"]["awsvpcConfiguration"].pop("securityGroups")
+    assert not updater.is_unchanged(payload, service_description)
@@ -1,4 +1,16 @@
-from ecsctrl.yaml_converter import TASK_DEFINITION, yaml_data_to_dict
+import pytest
+import yaml
+
+from ecsctrl.loader import SpecFileLoader, VarsLoader
+from ecsctrl.yaml_converter import (
+    JOB_DEFINITION,
+    SECRETS,
+    SERVICE,
+    TASK_DEFINITION,
+    yaml_data_to_dict,
+    yaml_to_dict,
+)
+from tests.data_files import get_file_path
 
 
 def test_yaml_data_to_dict():
@@ -27,3 +39,43 @@ def test_yaml_data_to_dict():
     out_dict = yaml_data_to_dict(in_yaml, TASK_DEFINITION)
 
     assert expected_out_dict == out_dict
+
+
+@pytest.mark.skipif(not yaml.__with_libyaml__, reason="PyYAML built without LibYAML")
+@pytest.mark.parametrize(
+    "file_name, file_type",
+    [
+        ("task-definition.yaml", TASK_DEFINITION),
+        ("service.yaml", SERVICE),
+        ("secrets.yaml", SECRETS),
+    ],
+)
+def test_yaml_to_dict_is_the_same_with_libyaml(file_name, file_type):
+    vars = VarsLoader([], [], [get_file_path("tf-output.json")], False).load()
+    raw_yaml = SpecFileLoader(get_file_path(file_name), vars).load()
+
+    assert yaml_to_dict(raw_yaml, file_type, yaml.CLoader) == yaml_to_dict(
+        raw_yaml, file_type, yaml.Loader
+    )
+
+
+def test_yaml_data_to_dict_applies_parent_rules_first():
+    in_yaml = {
+        "containerProperties": {
+            "environment": ["A=b"],
+            "resourceRequirements": {"vcpu": 1, "memory": 2048},
+        }
+    }
+    expected_out_dict = {
+        "containerProperties": {
+            "environment": [{"name": "A", "value": "b"}],
+            "resourceRequirements": [
+                {"type": "VCPU", "value": "1"},
+                {"type": "MEMORY", "value": "2048"},
+            ],
+        }
+    }
+
+    out_dict = yaml_data_to_dict(in_yaml, JOB_DEFINITION)
+
+    assert expected_out_dict == out_dict